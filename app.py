@@ -1,21 +1,26 @@
 import streamlit as st
-import pandas as pd
-import joblib
 import os
 
+from app_settings import BULK_DOWNLOAD_MAX_MB
+from input_schema import render_input_notes
+from latency_metrics import render_diagnostics, time_stage
+from prediction_cache import render_cache_panel
+from predictor import MODEL_PATH, get_predictor
+from shadow_scoring import render_shadow_panel
+from what_if import render_what_if
+
 # Set page configuration for a wider layout and a nice title
 st.set_page_config(layout="centered", page_title="Salary Predictor", page_icon="💰")
 
 # --- Load the trained model ---
-# Check if the model file exists
-model_path = "best_model.pkl"
-if not os.path.exists(model_path):
-    st.error(f"Error: Model file '{model_path}' not found. Please make sure 'best_model.pkl' is in the same directory as this script.")
-    st.stop() # Stop the app if the model is not found
-
+model_path = MODEL_PATH
 try:
-    # Load the pipeline from the .pkl file
-    model_pipeline = joblib.load(model_path)
+    # Loaded once per process and shared across sessions; reloads when the file changes.
+    # Only the first load can fail this way: once loaded, the model keeps serving if the file goes away.
+    salary_predictor = get_predictor(model_path)
+except FileNotFoundError:
+    st.error(f"Error: Model file '{model_path}' not found. Please make sure 'best_model.pkl' is in the same directory as this script.")
+    st.stop()
 except Exception as e:
     st.error(f"Error loading the model: {e}")
     st.stop()
@@ -84,31 +89,86 @@ with st.form("prediction_form"):
 
 # --- Prediction Logic ---
 if submitted:
-    # Create a DataFrame from the user input
-    input_data = pd.DataFrame([[education, experience, location, job_title, age, gender]],
-                              columns=['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender'])
-
-    # Explicitly ensure correct dtypes for the input DataFrame columns
-    # This is a defensive step to match the dtypes the model pipeline expects
-    # based on the original training data's structure.
-    input_data['Education'] = input_data['Education'].astype(str)
-    input_data['Location'] = input_data['Location'].astype(str)
-    input_data['Job_Title'] = input_data['Job_Title'].astype(str)
-    input_data['Gender'] = input_data['Gender'].astype(str)
-    input_data['Experience'] = pd.to_numeric(input_data['Experience'])
-    input_data['Age'] = pd.to_numeric(input_data['Age'])
+    # The compiled scorer takes the raw inputs directly; it applies the same
+    # str/numeric coercions the pipeline expects without building a DataFrame.
+    input_row = (education, experience, location, job_title, age, gender)
 
     try:
-        # Make prediction using the loaded pipeline
-        predicted_salary = model_pipeline.predict(input_data)[0]
+        # Make prediction using the shared predictor
+        with time_stage("app", "predict"):
+            predicted_salary = salary_predictor.predict_one(input_row, source="app")
+        st.session_state['what_if_row'] = input_row
 
         st.success(f"### Predicted Salary: ${predicted_salary:,.2f}")
+        render_input_notes(salary_predictor.schema, input_row)
         st.balloons() # A little celebratory animation!
 
     except Exception as e:
         st.error(f"An error occurred during prediction: {e}")
         st.warning("Please ensure all input fields are filled correctly and the model is compatible with the provided inputs.")
 
+# --- What-if curves for the last submitted input ---
+render_what_if(salary_predictor, st.session_state.get('what_if_row'), "app")
+
+st.write("---")
+
+# --- Bulk Scoring ---
+st.header("Bulk Scoring")
+st.markdown("""
+    Upload a CSV with the same columns as the training data to score every row.
+    The file is processed in chunks, so large HR extracts are supported.
+""")
+
+uploaded_file = st.file_uploader("Employee CSV", type="csv", help="Columns: Education, Experience, Location, Job_Title, Age, Gender.")
+
+if uploaded_file is not None and st.button("Score File 📊"):
+    progress_bar = st.progress(0.0, text="Scoring...")
+
+    def report_progress(rows_done, elapsed):
+        # Position in the upload drives the bar; the rate comes from real timings
+        fraction = min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0)
+        rows_per_sec = rows_done / elapsed if elapsed > 0 else 0.0
+        progress_bar.progress(fraction, text=f"Scored {rows_done:,} rows ({rows_per_sec:,.0f} rows/sec)")
+
+    # Deferred: pandas is only needed once a file is actually scored
+    from bulk_scoring import ScoredFile, score_csv
+
+    # Scored rows are spooled to disk so memory use stays flat for any file size
+    scored_file = ScoredFile()
+    try:
+        with open(scored_file.path, "w", newline="") as output, time_stage("app", "bulk_score"):
+            # Chunks go through SalaryPredictor.predict so bulk rows reach the audit log
+            total_rows = score_csv(salary_predictor, uploaded_file, output, progress_callback=report_progress,
+                                   intervals=salary_predictor.intervals, schema=salary_predictor.schema,
+                                   log_source="bulk")
+        scored_file.fit_static_limit()
+    except Exception as e:
+        scored_file.remove()
+        st.error(f"An error occurred during bulk scoring: {e}")
+    else:
+        previous = st.session_state.get("bulk_output")
+        if previous is not None:
+            previous.remove()
+        # Owned by the session: the file is deleted when the session ends
+        st.session_state["bulk_output"] = scored_file
+        st.session_state["bulk_total_rows"] = total_rows
+    progress_bar.empty()
+
+bulk_output = st.session_state.get("bulk_output")
+if bulk_output is not None and os.path.exists(bulk_output.path):
+    st.success(f"Scored {st.session_state['bulk_total_rows']:,} rows.")
+    download_name = "scored_salary_predictions" + bulk_output.name[bulk_output.name.index("."):]
+    if st.get_option("server.enableStaticServing"):
+        # Streamed from disk by Streamlit's static file server, not held in session memory
+        st.markdown(f'<a href="app/static/{bulk_output.name}" download="{download_name}">⬇️ Download Scored CSV</a>',
+                    unsafe_allow_html=True)
+    elif os.path.getsize(bulk_output.path) <= BULK_DOWNLOAD_MAX_MB * 1024 * 1024:
+        with open(bulk_output.path, "rb") as scored:
+            st.download_button(label="⬇️ Download Scored CSV", data=scored, file_name=download_name, mime="text/csv")
+    else:
+        st.warning(f"The scored file is larger than {BULK_DOWNLOAD_MAX_MB} MB. Run the app from the repository root "
+                   "(which enables `server.enableStaticServing` via .streamlit/config.toml) to download it.")
+
 st.write("---")
 st.info("Note: This prediction is an estimate based on the trained model and may not reflect actual market salaries precisely.")
 
@@ -118,3 +178,8 @@ st.sidebar.info(
     "This app demonstrates a simple salary prediction using a pre-trained machine learning model. "
     "The model was trained using scikit-learn and saved as a `.pkl` file."
 )
+
+# --- Sidebar diagnostics: per-stage latency of the prediction path ---
+render_diagnostics("app")
+render_cache_panel(salary_predictor.cache)
+render_shadow_panel(salary_predictor.shadow)
@@ -1,10 +1,17 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import os
 import time
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from app_settings import COSMETIC_DELAYS
+from input_schema import render_input_notes
+from latency_metrics import render_diagnostics, time_stage
+from lazy_imports import lazy_import
+from prediction_cache import render_cache_panel
+from predictor import MODEL_PATH, get_predictor
+from shadow_scoring import render_shadow_panel
+from what_if import render_what_if
+
+# pandas is only needed once the form is submitted
+pd = lazy_import("pandas")
 
 # --- Custom CSS ---
 st.markdown("""
@@ -92,13 +99,14 @@ st.markdown("""
 st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
 
 # --- Load the trained model ---
-model_path = "best_model.pkl"
-if not os.path.exists(model_path):
+model_path = MODEL_PATH
+try:
+    # Loaded once per process and shared across sessions; reloads when the file changes.
+    # Only the first load can fail this way: once loaded, the model keeps serving if the file goes away.
+    salary_predictor = get_predictor(model_path)
+except FileNotFoundError:
     st.error(f"Error: Model file '{model_path}' not found. Please make sure 'best_model.pkl' is in the same directory as this script.")
     st.stop()
-
-try:
-    model_pipeline = joblib.load(model_path)
 except Exception as e:
     st.error(f"Error loading the model: {e}")
     st.stop()
@@ -158,35 +166,43 @@ with st.form("prediction_form"):
 # --- Prediction Logic ---
 if submitted:
     # Create a DataFrame from the user input
-    input_data = pd.DataFrame([[education, experience, location, job_title, age, gender]],
-                              columns=['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender'])
+    with time_stage("app1", "build_input"):
+        input_data = pd.DataFrame([[education, experience, location, job_title, age, gender]],
+                                  columns=['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender'])
 
     # Ensure correct dtypes for the input DataFrame columns
-    input_data['Education'] = input_data['Education'].astype(str)
-    input_data['Location'] = input_data['Location'].astype(str)
-    input_data['Job_Title'] = input_data['Job_Title'].astype(str)
-    input_data['Gender'] = input_data['Gender'].astype(str)
-    input_data['Experience'] = pd.to_numeric(input_data['Experience'])
-    input_data['Age'] = pd.to_numeric(input_data['Age'])
-
-    # Animated progress bar
-    progress_text = "⏳ Predicting salary, please wait..."
-    my_bar = st.progress(0, text=progress_text)
-    for percent_complete in range(0, 101, 10):
-        time.sleep(0.07)
-        my_bar.progress(percent_complete, text=progress_text)
-    my_bar.empty()
+    with time_stage("app1", "coerce_dtypes"):
+        input_data['Education'] = input_data['Education'].astype(str)
+        input_data['Location'] = input_data['Location'].astype(str)
+        input_data['Job_Title'] = input_data['Job_Title'].astype(str)
+        input_data['Gender'] = input_data['Gender'].astype(str)
+        input_data['Experience'] = pd.to_numeric(input_data['Experience'])
+        input_data['Age'] = pd.to_numeric(input_data['Age'])
+
+    # Animated progress bar (cosmetic only; disable with SALARY_APP_COSMETIC_DELAYS=0)
+    if COSMETIC_DELAYS:
+        progress_text = "⏳ Predicting salary, please wait..."
+        my_bar = st.progress(0, text=progress_text)
+        for percent_complete in range(0, 101, 10):
+            time.sleep(0.07)
+            my_bar.progress(percent_complete, text=progress_text)
+        my_bar.empty()
 
     with st.spinner("Making prediction..."):
-        time.sleep(0.5)
+        if COSMETIC_DELAYS:
+            time.sleep(0.5)
         try:
-            predicted_salary = model_pipeline.predict(input_data)[0]
+            input_row = (education, experience, location, job_title, age, gender)
+            with time_stage("app1", "predict"):
+                predicted_salary = salary_predictor.predict_one(input_row, source="app1")
+            st.session_state['what_if_row'] = input_row
 
             # Show prediction in a styled card
             st.markdown(
                 f'<div class="prediction-card">Predicted Salary: <span style="font-size:32px; color:#16a34a;">${predicted_salary:,.2f}</span><br><span style="font-size:28px;">🥳</span></div>',
                 unsafe_allow_html=True
             )
+            render_input_notes(salary_predictor.schema, input_row)
 
             # Provide insights based on user input
             st.markdown("### Insights Based on Your Input")
@@ -201,14 +217,17 @@ if submitted:
             else:
                 st.markdown("💡 **Career Insight**: Explore networking opportunities in your field to discover new career paths.")
 
-            # Display potential salary range based on experience
-            min_salary = predicted_salary * 0.8  # 20% less
-            max_salary = predicted_salary * 1.2  # 20% more
-            st.markdown(f"### Potential Salary Range: ${min_salary:,.2f} - ${max_salary:,.2f}")
+            # Calibrated at training time from held-out residuals; a lookup, not a fixed ±20%
+            salary_range = salary_predictor.interval_one(input_row, predicted_salary)
+            if salary_range is not None:
+                min_salary, max_salary = salary_range
+                st.markdown(f"### Potential Salary Range: ${min_salary:,.2f} - ${max_salary:,.2f}")
+                st.caption(f"{salary_predictor.intervals.coverage:.0%} of comparable salaries fall in this range.")
 
             # Allow users to download their input data and prediction
-            input_data['Predicted_Salary'] = predicted_salary
-            csv = input_data.to_csv(index=False)
+            with time_stage("app1", "csv_report"):
+                input_data['Predicted_Salary'] = predicted_salary
+                csv = input_data.to_csv(index=False)
             st.download_button(
                 label="⬇️ Download Prediction Report",
                 data=csv,
@@ -220,6 +239,9 @@ if submitted:
             st.error(f"An error occurred during prediction: {e}")
             st.warning("Please ensure all input fields are filled correctly and the model is compatible with the provided inputs.")
 
+# --- What-if curves for the last submitted input ---
+render_what_if(salary_predictor, st.session_state.get('what_if_row'), "app1")
+
 st.markdown('<hr class="section-divider">', unsafe_allow_html=True)
 st.info("Note: This prediction is an estimate based on the trained model and may not reflect actual market salaries precisely.")
 
@@ -240,5 +262,10 @@ st.sidebar.markdown(
 st.sidebar.markdown("---")
 st.sidebar.markdown("Made with ❤️ using Streamlit")
 
+# --- Sidebar diagnostics: per-stage latency of the prediction path ---
+render_diagnostics("app1")
+render_cache_panel(salary_predictor.cache)
+render_shadow_panel(salary_predictor.shadow)
+
 # --- Footer ---
 st.markdown('<div class="footer">© 2025 Salary Predictor | Powered by Streamlit & scikit-learn</div>', unsafe_allow_html=True)
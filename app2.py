@@ -1,11 +1,19 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import os
 import time
-import plotly.express as px
-import numpy as np
-from PIL import Image
+
+from app_settings import COSMETIC_DELAYS
+from input_schema import render_input_notes
+from latency_metrics import render_diagnostics, time_stage
+from lazy_imports import lazy_import
+from prediction_cache import render_cache_panel
+from predictor import MODEL_PATH, get_predictor
+from salary_cube import DATA_PATH, EXPERIENCE_BANDS, EXPERIENCE_EDGES, get_cube
+from shadow_scoring import render_shadow_panel
+from what_if import render_what_if
+
+# plotly is only loaded when the first chart is drawn, after the form has rendered
+px = lazy_import("plotly.express")
+pd = lazy_import("pandas")
 
 # Set page configuration
 st.set_page_config(
@@ -44,13 +52,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Load the trained model ---
-model_path = "best_model.pkl"
-if not os.path.exists(model_path):
+model_path = MODEL_PATH
+try:
+    # Loaded once per process and shared across sessions; reloads when the file changes.
+    # Only the first load can fail this way: once loaded, the model keeps serving if the file goes away.
+    salary_predictor = get_predictor(model_path)
+except FileNotFoundError:
     st.error(f"Error: Model file '{model_path}' not found.")
     st.stop()
-
-try:
-    model_pipeline = joblib.load(model_path)
 except Exception as e:
     st.error(f"Error loading the model: {e}")
     st.stop()
@@ -125,16 +134,25 @@ with st.expander("🔍 Enter Employee Details", expanded=True):
 # --- Prediction Logic ---
 if submitted:
     with st.spinner("Analyzing market trends and predicting salary..."):
-        time.sleep(1.5)
+        # Cosmetic only; disable with SALARY_APP_COSMETIC_DELAYS=0
+        if COSMETIC_DELAYS:
+            time.sleep(1.5)
         
         # Create input DataFrame
-        input_data = pd.DataFrame([[education, experience, location, job_title, age, gender]],
-                                columns=['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender'])
+        with time_stage("app2", "build_input"):
+            input_data = pd.DataFrame([[education, experience, location, job_title, age, gender]],
+                                    columns=['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender'])
         
         try:
-            predicted_salary = model_pipeline.predict(input_data)[0]
-            salary_min = predicted_salary * 0.9
-            salary_max = predicted_salary * 1.15
+            input_row = (education, experience, location, job_title, age, gender)
+            with time_stage("app2", "predict"):
+                predicted_salary = salary_predictor.predict_one(input_row, source="app2")
+            st.session_state['what_if_row'] = input_row
+            # Calibrated at training time from held-out residuals; a lookup, not a fixed multiplier
+            salary_range = salary_predictor.interval_one(input_row, predicted_salary)
+            salary_min, salary_max = salary_range if salary_range is not None else (None, None)
+            range_text = (f"{salary_predictor.intervals.coverage:.0%} range: ${salary_min:,.2f} - ${salary_max:,.2f}"
+                          if salary_range is not None else "Range unavailable for this model")
             
             # Display prediction in a card
             with st.container():
@@ -142,38 +160,33 @@ if submitted:
                 <div class="salary-card">
                     <h2 style="color: #2d3748; text-align: center;">Your Salary Prediction</h2>
                     <h1 style="color: #2b6cb0; text-align: center;">${predicted_salary:,.2f}</h1>
-                    <p style="text-align: center; color: #4a5568;">Estimated range: ₹{salary_min:,.2f} - ₹{salary_max:,.2f}</p>
+                    <p style="text-align: center; color: #4a5568;">{range_text}</p>
                 </div>
                 """, unsafe_allow_html=True)
+                render_input_notes(salary_predictor.schema, input_row)
                 
                 st.balloons()
                 
-                # Visualization - Salary Comparison
-                st.subheader("How Does This Compare?")
-                comparison_df = pd.DataFrame({
-                    'Metric': ['Your Prediction', 'Industry Average', 'Experience Level'],
-                    'Value': [predicted_salary, predicted_salary * 0.85, predicted_salary * (1 + (experience/100))]
-                })
-                
-                fig = px.bar(comparison_df, x='Metric', y='Value', color='Metric',
-                            labels={'Value': 'Salary ($)'}, height=400)
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Visualization - Salary Components
-                st.subheader("Salary Breakdown")
-                components = {
-                    'Base Salary': predicted_salary * 0.7,
-                    'Experience Bonus': predicted_salary * 0.15,
-                    'Education Premium': predicted_salary * 0.1,
-                    'Location Adjustment': predicted_salary * 0.05
-                }
-                pie_fig = px.pie(values=components.values(), names=components.keys(), hole=0.4)
-                st.plotly_chart(pie_fig, use_container_width=True)
+                with time_stage("app2", "render_charts"):
+                    # Visualization - exact per-feature contributions of the linear model
+                    contributions = salary_predictor.explain_one(input_row)
+                    if contributions is not None:
+                        st.subheader("Salary Breakdown")
+                        components = {'Baseline': salary_predictor.kernel.baseline}
+                        components.update({col.replace('_', ' '): amount for col, amount in contributions.items()})
+                        names = [f"{name} ({amount:+,.0f})" if name != 'Baseline' else f"{name} ({amount:,.0f})"
+                                 for name, amount in components.items()]
+                        pie_fig = px.pie(values=[abs(amount) for amount in components.values()], names=names, hole=0.4)
+                        st.plotly_chart(pie_fig, use_container_width=True)
+                        st.caption("Slice sizes show each input's effect on your prediction; the signed amounts "
+                                   "in the legend add up to the predicted salary.")
                 
                 # Download report
-                input_data['Predicted Salary'] = predicted_salary
-                input_data['Confidence Range'] = f"${salary_min:,.2f} - ${salary_max:,.2f}"
-                csv = input_data.to_csv(index=False)
+                with time_stage("app2", "csv_report"):
+                    input_data['Predicted Salary'] = predicted_salary
+                    input_data['Salary Low'] = salary_min
+                    input_data['Salary High'] = salary_max
+                    csv = input_data.to_csv(index=False)
                 st.download_button(
                     label="📄 Download Detailed Report",
                     data=csv,
@@ -185,29 +198,74 @@ if submitted:
         except Exception as e:
             st.error(f"Prediction error: {e}")
 
+# --- What-if curves for the last submitted input; stays live across reruns ---
+render_what_if(salary_predictor, st.session_state.get('what_if_row'), "app2")
+
 # --- Market Insights Section ---
 st.markdown("---")
 st.header("💡 Market Insights")
 
-insight_cols = st.columns(3)
-with insight_cols[0]:
-    st.subheader("Education Impact")
-    st.metric("PhD Premium", "+30%", "+2% YoY")
-with insight_cols[1]:
-    st.subheader("Experience Value")
-    st.metric("Career Growth", "12%/year", "3-year avg")
-with insight_cols[2]:
-    st.subheader("Location Factor")
-    st.metric("Urban Premium", "+15%", "vs Rural")
-
-# Industry salary ranges illustration
-industry_df = pd.DataFrame({
-    'Industry': ['Tech', 'Finance', 'Healthcare', 'Marketing', 'Education'],
-    'Avg Salary': [120000, 150000, 95000, 85000, 70000]
-})
-st.plotly_chart(px.bar(industry_df, x='Industry', y='Avg Salary', 
-                       title="Average Salaries by Industry", height=400),
-                use_container_width=True)
+
+def premium(cube, dimension, value, baseline):
+    """Median salary of `value` relative to `baseline` along one cube dimension."""
+    stats, base = cube.lookup(**{dimension: value}), cube.lookup(**{dimension: baseline})
+    return stats['median'] / base['median'] - 1 if stats and base else None
+
+
+def yearly_growth(cube):
+    """Annualized growth of the median salary between the lowest and highest populated experience bands."""
+    bands = [i for i, band in enumerate(EXPERIENCE_BANDS) if cube.lookup(Experience_Band=band)]
+    if len(bands) < 2:
+        return None, ""
+    first, last = bands[0], bands[-1]
+    midpoints = [(lo + hi) / 2 for lo, hi in zip(EXPERIENCE_EDGES, EXPERIENCE_EDGES[1:] + (EXPERIENCE_EDGES[-1],))]
+    years = midpoints[last] - midpoints[first]
+    ratio = cube.lookup(Experience_Band=EXPERIENCE_BANDS[last])['median'] / cube.lookup(Experience_Band=EXPERIENCE_BANDS[first])['median']
+    return ratio ** (1 / years) - 1, f"{EXPERIENCE_BANDS[first]} → {EXPERIENCE_BANDS[last]} yrs"
+
+
+try:
+    # Aggregated once per process and persisted; refreshed when the CSV grows
+    with time_stage("app2", "market_insights"):
+        cube = get_cube(DATA_PATH)
+except (OSError, ValueError) as e:
+    cube = None
+    st.info(f"Market insights are unavailable: {e}")
+
+if cube is not None:
+    phd_premium = premium(cube, 'Education', 'PhD', 'Bachelor')
+    urban_premium = premium(cube, 'Location', 'Urban', 'Rural')
+    growth, growth_span = yearly_growth(cube)
+
+    insight_cols = st.columns(3)
+    with insight_cols[0]:
+        st.subheader("Education Impact")
+        st.metric("PhD Premium", f"{phd_premium:+.0%}" if phd_premium is not None else "n/a",
+                  "median vs Bachelor", delta_color="off")
+    with insight_cols[1]:
+        st.subheader("Experience Value")
+        st.metric("Career Growth", f"{growth:.1%}/year" if growth is not None else "n/a",
+                  growth_span, delta_color="off")
+    with insight_cols[2]:
+        st.subheader("Location Factor")
+        st.metric("Urban Premium", f"{urban_premium:+.0%}" if urban_premium is not None else "n/a",
+                  "median vs Rural", delta_color="off")
+
+    # Median salary per job title, with the interquartile range as error bars. Drawing it loads
+    # pandas and plotly (about a second), so it is drawn on request rather than on first render.
+    if st.checkbox("📈 Show median salary by job title"):
+        by_title = cube.breakdown('Job_Title')
+        title_df = pd.DataFrame({
+            'Job Title': list(by_title),
+            'Median Salary': [s['median'] for s in by_title.values()],
+            'p75': [s['p75'] - s['median'] for s in by_title.values()],
+            'p25': [s['median'] - s['p25'] for s in by_title.values()],
+            'Employees': [s['count'] for s in by_title.values()],
+        })
+        st.plotly_chart(px.bar(title_df, x='Job Title', y='Median Salary', error_y='p75', error_y_minus='p25',
+                               hover_data=['Employees'], height=400,
+                               title=f"Median Salary by Job Title (25th–75th percentile, {cube.n_rows:,} employees)"),
+                        use_container_width=True)
 
 # --- Sidebar Features ---
 with st.sidebar:
@@ -225,14 +283,22 @@ with st.sidebar:
         """)
     
     with st.expander("📊 Sample Data"):
-        st.dataframe(pd.DataFrame({
-            'Education': ['PhD', 'Master', 'Bachelor'],
-            'Experience': [10, 5, 3],
-            'Predicted Salary': [150000, 100000, 75000]
-        }))
+        # A markdown table: st.dataframe would import pandas on every first render
+        st.markdown("""
+        | Education | Experience | Predicted Salary |
+        |---|---:|---:|
+        | PhD | 10 | 150,000 |
+        | Master | 5 | 100,000 |
+        | Bachelor | 3 | 75,000 |
+        """)
     
     if st.button("🔄 Reset All Inputs", use_container_width=True):
         st.rerun()
 
+# --- Sidebar diagnostics: per-stage latency of the prediction path ---
+render_diagnostics("app2")
+render_cache_panel(salary_predictor.cache)
+render_shadow_panel(salary_predictor.shadow)
+
 st.markdown("---")
 st.caption("Note: Predictions are estimates based on our machine learning model. Actual offers may vary.")
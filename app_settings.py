@@ -0,0 +1,51 @@
+"""Runtime settings for the Streamlit apps, read from environment variables.
+
+    SALARY_APP_COSMETIC_DELAYS=0     skip the decorative progress bars and sleeps
+    SALARY_APP_PREDICTION_CACHE=N    entries in the cross-session prediction cache (0 disables it)
+    SALARY_APP_PREDICTION_LOG=DIR    directory of the prediction audit log (empty disables it)
+    SALARY_APP_MODEL_REGISTRY=DIR    model registry whose promoted version replaces best_model.pkl (empty disables it)
+    SALARY_APP_BULK_DOWNLOAD_MAX_MB=N largest scored file offered through st.download_button without static serving
+    SALARY_APP_MICRO_BATCH=N         most rows scored together from concurrent sessions (0 or 1 disables batching)
+    SALARY_APP_MICRO_BATCH_WAIT_MS=X how long a batch waits for more rows (0: only rows already queued)
+"""
+import os
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+    return default if value is None or not value.strip() else int(value)
+
+
+def env_float(name, default):
+    value = os.environ.get(name)
+    return default if value is None or not value.strip() else float(value)
+
+
+def env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+# The progress animations in app1.py/app2.py add ~2s of artificial latency;
+# turn them off in production so users (and the metrics) see real timings.
+COSMETIC_DELAYS = env_flag("SALARY_APP_COSMETIC_DELAYS", True)
+
+# Bounded LRU cache of predictions shared by every session of a process
+PREDICTION_CACHE_SIZE = env_int("SALARY_APP_PREDICTION_CACHE", 4096)
+
+# Audit trail of every prediction (inputs, output, model version, latency) as Parquet files
+PREDICTION_LOG_DIR = os.environ.get("SALARY_APP_PREDICTION_LOG", "prediction_logs").strip()
+
+# Versioned models behind an atomic "current" pointer (model_registry.py); served when a version is promoted
+MODEL_REGISTRY_DIR = os.environ.get("SALARY_APP_MODEL_REGISTRY", "model_registry").strip()
+
+# Without server.enableStaticServing, scored bulk files are sent through st.download_button, which
+# holds the whole file in the session's memory; larger files are not offered that way
+BULK_DOWNLOAD_MAX_MB = env_int("SALARY_APP_BULK_DOWNLOAD_MAX_MB", 50)
+
+# Single-row model calls from concurrent sessions are scored together by one worker thread
+# (micro_batching.py). Without a wait, a batch is whatever queued up while the previous one ran.
+MICRO_BATCH_SIZE = env_int("SALARY_APP_MICRO_BATCH", 64)
+MICRO_BATCH_WAIT_MS = env_float("SALARY_APP_MICRO_BATCH_WAIT_MS", 0.0)
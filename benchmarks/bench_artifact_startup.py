@@ -0,0 +1,66 @@
+"""Cold-start cost of loading best_model.pkl vs. the .npz + .json artifact.
+
+Each measurement runs in a fresh interpreter so import costs are included,
+which is what a new app replica pays before it can serve.
+
+Run from the repository root:  python -m benchmarks.bench_artifact_startup --runs 7
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+PICKLE_SNIPPET = """
+import time
+start = time.perf_counter()
+import joblib
+from linear_kernel import compile_predictor
+scorer = compile_predictor(joblib.load({model!r}))
+scorer.predict_one(('Bachelor', 5, 'Urban', 'Engineer', 30, 'Male'))
+print(time.perf_counter() - start)
+"""
+
+ARTIFACT_SNIPPET = """
+import time
+start = time.perf_counter()
+from model_artifact import load_artifact
+scorer = load_artifact({model!r})
+scorer.predict_one(('Bachelor', 5, 'Urban', 'Engineer', 30, 'Male'))
+import sys
+assert 'sklearn' not in sys.modules
+print(time.perf_counter() - start)
+"""
+
+
+def time_snippet(snippet, model, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", snippet.format(model=model)],
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default="best_model.pkl")
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    from model_artifact import artifact_is_fresh, export_artifact
+    if not artifact_is_fresh(args.model):
+        import joblib
+        export_artifact(joblib.load(args.model), args.model)
+
+    results = {
+        'pickle (joblib + sklearn)': time_snippet(PICKLE_SNIPPET, args.model, args.runs),
+        'artifact (.npz + .json)': time_snippet(ARTIFACT_SNIPPET, args.model, args.runs),
+    }
+    for name, samples in results.items():
+        print(f"{name:28s} median {statistics.median(samples) * 1e3:8.1f} ms   min {min(samples) * 1e3:8.1f} ms")
+    pickle_ms, artifact_ms = (statistics.median(s) for s in results.values())
+    print(f"speedup: {pickle_ms / artifact_ms:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Per-row latency of the sklearn pipeline vs. the compiled LinearKernel.
+
+Run from the repository root:  python -m benchmarks.bench_linear_kernel
+"""
+import argparse
+import timeit
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from linear_kernel import compile_pipeline
+from schema import FEATURE_COLUMNS
+
+SAMPLE_ROW = ('Bachelor', 5, 'Urban', 'Engineer', 30, 'Male')
+
+
+def pipeline_row(model_pipeline, row):
+    # Mirrors the per-submit path in the apps: one-row DataFrame, coercions, predict
+    input_data = pd.DataFrame([row], columns=FEATURE_COLUMNS)
+    input_data['Education'] = input_data['Education'].astype(str)
+    input_data['Location'] = input_data['Location'].astype(str)
+    input_data['Job_Title'] = input_data['Job_Title'].astype(str)
+    input_data['Gender'] = input_data['Gender'].astype(str)
+    input_data['Experience'] = pd.to_numeric(input_data['Experience'])
+    input_data['Age'] = pd.to_numeric(input_data['Age'])
+    return model_pipeline.predict(input_data)[0]
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='best_model.pkl')
+    parser.add_argument('--data', default='salary_prediction_data.csv')
+    args = parser.parse_args()
+
+    model_pipeline = joblib.load(args.model)
+    kernel = compile_pipeline(model_pipeline)
+    data = pd.read_csv(args.data).dropna()[FEATURE_COLUMNS]
+
+    max_error = np.abs(kernel.predict(data) - model_pipeline.predict(data)).max()
+    print(f"max |kernel - pipeline| over {len(data):,} rows: {max_error:.3e}")
+
+    pipeline_s = best_of(lambda: pipeline_row(model_pipeline, SAMPLE_ROW), number=200)
+    kernel_s = best_of(lambda: kernel.predict_one(SAMPLE_ROW), number=20_000)
+    print(f"single row  pipeline: {pipeline_s * 1e6:10.1f} us   kernel: {kernel_s * 1e6:8.2f} us   "
+          f"speedup: {pipeline_s / kernel_s:,.0f}x")
+
+    rows = data.to_numpy(dtype=object)
+    batch_pipeline_s = best_of(lambda: model_pipeline.predict(data), number=20)
+    batch_kernel_s = best_of(lambda: kernel.predict(rows), number=20)
+    print(f"{len(data):,}-row batch  pipeline: {batch_pipeline_s / len(data) * 1e6:6.2f} us/row   "
+          f"kernel: {batch_kernel_s / len(data) * 1e6:6.2f} us/row")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Throughput and tail latency of concurrent single-row predictions, direct vs. micro-batched.
+
+Each of --threads "sessions" scores --requests rows one at a time, either by
+calling the scorer directly or through a shared BatchingExecutor. Scorers: the
+compiled best_model.pkl, and a GradientBoostingRegressor pipeline fitted as in
+train.py, both as a compiled TreeEnsembleKernel and as plain sklearn
+(``pipeline.predict`` on a one-row DataFrame, what the apps used to do).
+
+Run from the repository root:  python -m benchmarks.bench_micro_batching --threads 1 8 32
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+from app_settings import MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS
+from linear_kernel import PipelineScorer
+from micro_batching import BatchingExecutor
+from model_artifact import load_model
+from train import build_preprocessor, candidate_models, load_training_data
+from tree_kernel import compile_tree_pipeline
+
+
+def run_sessions(predict_one, rows, n_threads, n_requests):
+    """Return (rows per second, per-call latencies in seconds) of `n_threads` concurrent sessions."""
+    latencies = [[] for _ in range(n_threads)]
+    barrier = threading.Barrier(n_threads + 1)
+
+    def session(i):
+        timings = latencies[i]
+        barrier.wait()
+        for j in range(n_requests):
+            row = rows[(i * n_requests + j) % len(rows)]
+            start = time.perf_counter()
+            predict_one(row)
+            timings.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return n_threads * n_requests / elapsed, np.concatenate(latencies)
+
+
+def describe(label, throughput, latencies, extra=""):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1e3
+    print(f"    {label:<8} {throughput:>10,.0f} rows/s   p50 {p50:8.3f} ms   p95 {p95:8.3f} ms   "
+          f"p99 {p99:8.3f} ms{extra}")
+
+
+def benchmark(name, scorer, rows, args):
+    print(f"{name}:")
+    for n_threads in args.threads:
+        n_requests = max(1, args.rows // n_threads)
+        print(f"  {n_threads} sessions x {n_requests:,} requests")
+        describe("direct", *run_sessions(scorer.predict_one, rows, n_threads, n_requests))
+        batcher = BatchingExecutor(scorer.predict, args.max_batch, args.max_wait_ms)
+        try:
+            throughput, latencies = run_sessions(batcher.predict_one, rows, n_threads, n_requests)
+        finally:
+            batcher.close()
+        describe("batched", throughput, latencies, f"   ({batcher.rows / max(1, batcher.batches):.1f} rows/batch)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='best_model.pkl')
+    parser.add_argument('--data', default='salary_prediction_data.csv')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--rows', type=int, default=4000, help="Predictions per run, split across the sessions.")
+    parser.add_argument('--max-batch', type=int, default=MICRO_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MICRO_BATCH_WAIT_MS)
+    args = parser.parse_args()
+
+    x, y = load_training_data(args.data)
+    rows = list(x.itertuples(index=False, name=None))
+    pipeline = Pipeline([('preprocessor', build_preprocessor()),
+                         ('regressor', candidate_models()['GradientBoostingRegressor'])]).fit(x, y)
+    scorers = {
+        f"{args.model} (compiled)": load_model(args.model)[0],
+        "GradientBoostingRegressor (TreeEnsembleKernel)": compile_tree_pipeline(pipeline),
+        "GradientBoostingRegressor (sklearn pipeline)": PipelineScorer(pipeline),
+    }
+    for name, scorer in scorers.items():
+        benchmark(name, scorer, rows, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Per-request overhead of the prediction audit log (prediction_log.py).
+
+Times ``SalaryPredictor.predict_one`` with logging off and on, then closes the
+logger and reads the files back to check nothing was lost.
+
+Run from the repository root:  python -m benchmarks.bench_prediction_log
+"""
+import argparse
+import itertools
+import random
+import tempfile
+import time
+import timeit
+
+from prediction_log import PredictionLogger, prediction_files, read_predictions
+from prediction_table import GRID_AXES
+from predictor import get_predictor
+from schema import FEATURE_COLUMNS
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50_000, help="predict_one calls per timing run.")
+    parser.add_argument('--flush-interval', type=float, default=0.2)
+    args = parser.parse_args()
+
+    predictor = get_predictor()
+    rng = random.Random(0)
+    rows = [tuple(rng.choice(GRID_AXES[col]) for col in FEATURE_COLUMNS) for _ in range(1000)]
+    cycle = itertools.cycle(rows)
+
+    predictor.logger = None
+    baseline_s = best_of(lambda: predictor.predict_one(next(cycle), source="bench"), number=args.requests)
+
+    with tempfile.TemporaryDirectory() as directory:
+        logger = PredictionLogger(directory, flush_interval=args.flush_interval)
+        predictor.logger = logger
+        logged_s = best_of(lambda: predictor.predict_one(next(cycle), source="bench"), number=args.requests)
+        log_only_s = best_of(lambda: logger.log("bench", rows[0], 1.0, 1e-6, predictor.version), number=args.requests)
+
+        start = time.perf_counter()
+        logger.close()
+        close_s = time.perf_counter() - start
+        logged = len(read_predictions(directory, columns=['prediction']))
+        files = len(prediction_files(directory))
+
+    print(f"predict_one without log: {baseline_s * 1e6:6.2f} us   with log: {logged_s * 1e6:6.2f} us   "
+          f"overhead: {(logged_s - baseline_s) * 1e6:5.2f} us/request")
+    print(f"logger.log alone:        {log_only_s * 1e6:6.2f} us")
+    print(f"records written: {logged:,} in {files} file(s), dropped: {logger.dropped:,}, "
+          f"final flush on close: {close_s * 1e3:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Peak RSS and throughput of out-of-core training (train.py --streaming).
+
+Synthetic payroll files of increasing size are generated by resampling
+salary_prediction_data.csv, then each is trained in a fresh process so peak
+RSS is measured per run. Flat peak RSS across sizes shows memory is bounded
+by the chunk size, not the file size.
+
+Run from the repository root:  python -m benchmarks.bench_streaming_training --rows 100000 1000000 4000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+def write_synthetic_csv(path, n_rows, source="salary_prediction_data.csv", chunk=250_000, seed=0):
+    sample = pd.read_csv(source).dropna()
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < n_rows:
+            size = min(chunk, n_rows - written)
+            rows = sample.iloc[rng.integers(len(sample), size=size)].copy()
+            rows['Salary'] += rng.normal(0, 1000, size=size)
+            rows.to_csv(f, header=(written == 0), index=False)
+            written += size
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(path, chunksize):
+    import train
+
+    baseline = peak_rss_mb()
+    _, report = train.train_streaming(path, chunksize=chunksize)
+    metrics = report['models']['LinearRegression']
+    print(json.dumps({'rows': report['n_rows'], 'rows_per_s': metrics['rows_per_s'],
+                      'wall_clock_s': metrics['wall_clock_s'], 'baseline_rss_mb': baseline,
+                      'peak_rss_mb': peak_rss_mb()}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>12} {'file MB':>9} {'rows/s':>12} {'wall s':>8} {'peak RSS MB':>12} {'over baseline':>14}")
+        for n_rows in args.rows:
+            path = os.path.join(tmp, f"payroll_{n_rows}.csv")
+            write_synthetic_csv(path, n_rows)
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_streaming_training", "--worker", path,
+                 "--chunksize", str(args.chunksize)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['rows']:>12,} {os.path.getsize(path) / 1e6:>9.1f} {result['rows_per_s']:>12,.0f} "
+                  f"{result['wall_clock_s']:>8.2f} {result['peak_rss_mb']:>12.1f} "
+                  f"{result['peak_rss_mb'] - result['baseline_rss_mb']:>14.1f}")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
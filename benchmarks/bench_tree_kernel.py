@@ -0,0 +1,72 @@
+"""Batch latency of sklearn's ``pipeline.predict`` vs. the flattened TreeEnsembleKernel.
+
+best_model.pkl is linear, so by default RandomForestRegressor and
+GradientBoostingRegressor pipelines are fitted on the training data as in
+train.py; pass --model to benchmark a saved pipeline instead. Batches are rows
+of the training data resampled with replacement.
+
+Run from the repository root:  python -m benchmarks.bench_tree_kernel --batch-sizes 1 1000 100000
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+from train import build_preprocessor, candidate_models, load_training_data
+from tree_kernel import compile_tree_pipeline
+
+
+def best_time(func, min_time=0.5, repeat=3):
+    """Seconds per call: best of `repeat` rounds, each running `func` for at least `min_time`."""
+    best = float('inf')
+    for _ in range(repeat):
+        calls, start = 0, time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def benchmark(name, pipeline, data, batch_sizes, rng):
+    kernel = compile_tree_pipeline(pipeline)
+    max_error = np.abs(kernel.predict(data) - pipeline.predict(data)).max()
+    print(f"{name}: {kernel.n_trees} trees, {kernel.n_nodes:,} nodes, depth {kernel.depth}; "
+          f"max |kernel - pipeline| over {len(data):,} rows: {max_error:.3e}")
+    for size in batch_sizes:
+        batch = data.iloc[rng.integers(0, len(data), size)].reset_index(drop=True)
+        rows = batch.to_numpy(dtype=object)
+        pipeline_s = best_time(lambda: pipeline.predict(batch))
+        kernel_s = best_time(lambda: kernel.predict(rows))
+        print(f"    batch {size:>7,}  pipeline: {pipeline_s * 1e3:9.3f} ms   kernel: {kernel_s * 1e3:9.3f} ms   "
+              f"({kernel_s / size * 1e6:7.3f} us/row)   speedup: {pipeline_s / kernel_s:5.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', help="A saved tree-ensemble pipeline (default: fit RF and GB).")
+    parser.add_argument('--data', default='salary_prediction_data.csv')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 1000, 100_000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    x, y = load_training_data(args.data)
+    rng = np.random.default_rng(args.seed)
+    if args.model:
+        pipelines = {args.model: joblib.load(args.model)}
+    else:
+        models = candidate_models()
+        pipelines = {name: Pipeline([('preprocessor', build_preprocessor()), ('regressor', models[name])]).fit(x, y)
+                     for name in ('RandomForestRegressor', 'GradientBoostingRegressor')}
+    for name, pipeline in pipelines.items():
+        benchmark(name, pipeline, pd.DataFrame(x).reset_index(drop=True), args.batch_sizes, rng)
+
+
+if __name__ == '__main__':
+    main()
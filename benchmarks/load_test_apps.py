@@ -0,0 +1,241 @@
+"""Concurrent-session load test for the Streamlit apps.
+
+Each app is driven headlessly with Streamlit's AppTest by simulated sessions
+that repeatedly fill in the prediction form and submit it. Inputs are drawn
+from rows of salary_prediction_data.csv, with a share of job titles the model
+has never seen (what users type into app.py).
+
+AppTest swaps process-global runtime state on every run, so sessions cannot
+run on threads of one process. Instead ``--workers`` processes run side by
+side (like server replicas under load) and each interleaves ``--sessions``
+sessions that share its process-wide caches. Reported per app:
+
+* throughput: submissions per second across all workers
+* rerun latency after submit: mean, p50, p95, p99, max
+* memory: RSS growth per open session and per submission
+
+Run from the repository root:
+    python -m benchmarks.load_test_apps --workers 4 --sessions 8 --submissions 10
+    python -m benchmarks.load_test_apps --output run.json --baseline previous.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APPS = ("app.py", "app1.py", "app2.py")
+DATA_PATH = "salary_prediction_data.csv"
+
+# Free-text titles typed into app.py, next to the ones from the data
+UNSEEN_JOB_TITLES = ("Software Engineer", "Data Scientist", "Senior Manager", "analyst", "Product Manager")
+UNSEEN_JOB_TITLE_SHARE = 0.2
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current RSS off Linux (kilobytes on Linux, bytes on macOS)
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def load_input_rows(path=DATA_PATH):
+    import csv
+
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _set(widgets, label, value):
+    for widget in widgets:
+        if widget.label == label:
+            widget.set_value(value)
+            return
+
+
+def fill_form(at, row, rng):
+    """Set the form widgets of any of the three apps from one data row."""
+    for widget in at.selectbox:
+        column = {'Education Level': 'Education', 'Location Type': 'Location', 'Job Title': 'Job_Title'}.get(widget.label)
+        if column:
+            widget.set_value(row[column] if row[column] in widget.options else rng.choice(widget.options))
+    for widgets in (at.number_input, at.slider):
+        for widget in widgets:
+            column = {'Years of Experience': 'Experience', 'Age': 'Age'}.get(widget.label)
+            if column:
+                widget.set_value(min(max(int(float(row[column])), widget.min), widget.max))
+    for widget in at.radio:
+        if widget.label == 'Gender':
+            widget.set_value(row['Gender'] if row['Gender'] in widget.options else rng.choice(widget.options))
+    title = rng.choice(UNSEEN_JOB_TITLES) if rng.random() < UNSEEN_JOB_TITLE_SHARE else row['Job_Title']
+    _set(at.text_input, 'Job Title', title)
+
+
+def submit(at):
+    next(button for button in at.button if 'Predict' in button.label).click()
+
+
+def worker(app, sessions, submissions, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    rows = load_input_rows()
+
+    # Warm the process-wide state (model, caches, lazy imports) like a long-running server
+    warm = AppTest.from_file(app, default_timeout=timeout).run()
+    submit(warm)
+    warm.run()
+    del warm
+    rss_baseline = current_rss_mb()
+
+    first_render, apps = [], []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        apps.append(AppTest.from_file(app, default_timeout=timeout).run())
+        first_render.append(time.perf_counter() - start)
+    rss_open = current_rss_mb()
+
+    latencies, errors = [], 0
+    loop_start = time.time()
+    for _ in range(submissions):
+        # Sessions take turns, as requests from concurrent users interleave on a server
+        for at in apps:
+            fill_form(at, rng.choice(rows), rng)
+            submit(at)
+            start = time.perf_counter()
+            at.run()
+            latencies.append(time.perf_counter() - start)
+            errors += len(at.exception)
+    loop_end = time.time()
+
+    print(json.dumps({
+        'latencies_s': latencies, 'first_render_s': first_render, 'errors': errors,
+        'loop_start': loop_start, 'loop_end': loop_end,
+        'rss_baseline_mb': rss_baseline, 'rss_open_mb': rss_open, 'rss_end_mb': current_rss_mb(),
+    }))
+
+
+def load_test_app(app, workers, sessions, submissions, seed, timeout):
+    # Predictions are still logged, as in production, but outside the real audit trail
+    with tempfile.TemporaryDirectory(prefix="load-test-log-") as log_dir:
+        env = dict(os.environ, SALARY_APP_COSMETIC_DELAYS="0", SALARY_APP_PREDICTION_LOG=log_dir,
+                   PYTHONPATH=os.getcwd())
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.load_test_apps", "--worker", app, "--sessions", str(sessions),
+                 "--submissions", str(submissions), "--seed", str(seed + i), "--timeout", str(timeout)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env,
+            )
+            for i in range(workers)
+        ]
+        results = []
+        for process in processes:
+            stdout, stderr = process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(f"Load test worker for {app} failed:\n{stderr[-2000:]}")
+            results.append(json.loads(stdout.strip().splitlines()[-1]))
+
+    latencies = sorted(s for r in results for s in r['latencies_s'])
+    window = max(r['loop_end'] for r in results) - min(r['loop_start'] for r in results)
+    per_session = [(r['rss_end_mb'] - r['rss_baseline_mb']) / sessions for r in results]
+    per_submission = [(r['rss_end_mb'] - r['rss_open_mb']) * 1024 / (sessions * submissions) for r in results]
+    return {
+        'workers': workers, 'sessions': workers * sessions, 'submissions': len(latencies),
+        'errors': sum(r['errors'] for r in results),
+        'throughput_per_s': len(latencies) / window if window > 0 else None,
+        'latency_ms': {
+            'mean': statistics.fmean(latencies) * 1e3,
+            'p50': percentile(latencies, 0.50) * 1e3,
+            'p95': percentile(latencies, 0.95) * 1e3,
+            'p99': percentile(latencies, 0.99) * 1e3,
+            'max': latencies[-1] * 1e3,
+        },
+        'first_render_ms_p50': statistics.median(s for r in results for s in r['first_render_s']) * 1e3,
+        'memory_mb_per_session': statistics.fmean(per_session),
+        'memory_kb_per_submission': statistics.fmean(per_submission),
+        'rss_end_mb_max': max(r['rss_end_mb'] for r in results),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, baseline):
+    print(f"\nChange vs {baseline.get('commit') or 'baseline'}:")
+    for app, result in report['apps'].items():
+        before = baseline.get('apps', {}).get(app)
+        if not before:
+            continue
+        changes = [
+            f"throughput {result['throughput_per_s'] / before['throughput_per_s'] - 1:+.0%}",
+            f"p95 {result['latency_ms']['p95'] / before['latency_ms']['p95'] - 1:+.0%}",
+            f"memory/session {result['memory_mb_per_session'] - before['memory_mb_per_session']:+.1f} MB",
+        ]
+        print(f"  {app}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', default=list(APPS))
+    parser.add_argument('--workers', type=int, default=4, help="Processes running sessions side by side.")
+    parser.add_argument('--sessions', type=int, default=8, help="Interleaved sessions per worker.")
+    parser.add_argument('--submissions', type=int, default=10, help="Form submissions per session.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds allowed per script run.")
+    parser.add_argument('--output', help="Write the results as JSON.")
+    parser.add_argument('--baseline', help="JSON from an earlier run to compare against.")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.sessions, args.submissions, args.seed, args.timeout)
+        return
+
+    import streamlit
+
+    report = {
+        'commit': git_commit(), 'created_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'python': platform.python_version(), 'streamlit': streamlit.__version__,
+        'config': {'workers': args.workers, 'sessions_per_worker': args.sessions,
+                   'submissions_per_session': args.submissions, 'seed': args.seed},
+        'apps': {},
+    }
+    for app in args.apps:
+        result = load_test_app(app, args.workers, args.sessions, args.submissions, args.seed, args.timeout)
+        report['apps'][app] = result
+        latency = result['latency_ms']
+        print(f"{app}: {result['submissions']:,} submissions from {result['sessions']} sessions "
+              f"({result['errors']} errors), {result['throughput_per_s']:.1f}/s")
+        print(f"    rerun latency p50 {latency['p50']:.0f} ms  p95 {latency['p95']:.0f} ms  "
+              f"p99 {latency['p99']:.0f} ms  max {latency['max']:.0f} ms")
+        print(f"    memory {result['memory_mb_per_session']:.2f} MB/session, "
+              f"{result['memory_kb_per_submission']:.1f} KB/submission")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
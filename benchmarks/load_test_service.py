@@ -0,0 +1,84 @@
+"""Closed-loop load test for inference_service.py.
+
+Start the service first (python inference_service.py), then run from the
+repository root:  python -m benchmarks.load_test_service --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from prediction_table import GRID_AXES
+
+
+def random_instance(rng):
+    return {col: rng.choice(axis) for col, axis in GRID_AXES.items()}
+
+
+async def client(host, port, deadline, latencies, rng, batch_size):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            if batch_size > 1:
+                payload = {'instances': [random_instance(rng) for _ in range(batch_size)]}
+            else:
+                payload = random_instance(rng)
+            body = json.dumps(payload).encode()
+            start = time.perf_counter()
+            writer.write(
+                f"POST /predict HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            if b' 200 ' not in status_line:
+                raise RuntimeError(f"Unexpected response: {status_line!r}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run(args):
+    latencies = []
+    rng = random.Random(0)
+    deadline = time.perf_counter() + args.duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, deadline, latencies, random.Random(rng.random()), args.batch_size)
+        for _ in range(args.concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"requests: {len(latencies):,} in {elapsed:.1f}s with {args.concurrency} concurrent clients "
+          f"(batch size {args.batch_size})")
+    print(f"throughput: {len(latencies) / elapsed:,.0f} req/s, {len(latencies) * args.batch_size / elapsed:,.0f} rows/s")
+    print(f"latency p50: {percentile(latencies, 0.50) * 1e3:.2f} ms   p99: {percentile(latencies, 0.99) * 1e3:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to run.")
+    parser.add_argument('--batch-size', type=int, default=1, help="Instances per request.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
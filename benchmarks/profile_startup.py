@@ -0,0 +1,123 @@
+"""Startup profile of each Streamlit app: per-module import cost and time to first render.
+
+Every app is run headlessly with Streamlit's AppTest in a fresh interpreter
+started with ``-X importtime``. Streamlit and the test harness are imported
+first, so the import costs reported are the ones the app script itself adds.
+Time to first render is the wall time of the first full script run.
+
+Run from the repository root:
+    python -m benchmarks.profile_startup                 # report
+    python -m benchmarks.profile_startup --check         # also fail if over budget
+    python -m benchmarks.profile_startup --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+APPS = ("app.py", "app1.py", "app2.py")
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), "startup_budget.json")
+MARKER = "--- app script starts ---"
+
+
+def worker(app):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app, default_timeout=120)
+    print(MARKER, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    at.run()
+    first_render = time.perf_counter() - start
+    if at.exception:
+        raise SystemExit(f"{app} raised: {at.exception[0].message}")
+    start = time.perf_counter()
+    at.run()
+    print(json.dumps({'first_render_s': first_render, 'rerun_s': time.perf_counter() - start}))
+
+
+def parse_importtime(stderr):
+    """Sum cumulative import time (us) per top-level package for imports triggered by the app."""
+    costs = defaultdict(int)
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    for line in lines:
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Only the outermost imports; nested ones are already in their parent's cumulative time
+        if name.startswith("  "):
+            continue
+        costs[name.strip().split(".")[0]] += int(cumulative)
+    return dict(costs)
+
+
+def profile_app(app, runs):
+    env = dict(os.environ, SALARY_APP_COSMETIC_DELAYS="0", PYTHONPATH=os.getcwd())
+    renders, reruns, imports = [], [], []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "benchmarks.profile_startup", "--worker", app],
+            capture_output=True, text=True, env=env,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Profiling {app} failed:\n{result.stderr[-2000:]}")
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        renders.append(timings['first_render_s'])
+        reruns.append(timings['rerun_s'])
+        imports.append(parse_importtime(result.stderr))
+
+    modules = {name: statistics.median(run.get(name, 0) for run in imports) / 1e3
+               for name in set().union(*imports)}
+    return {
+        'first_render_ms': statistics.median(renders) * 1e3,
+        'rerun_ms': statistics.median(reruns) * 1e3,
+        'import_ms': sum(modules.values()),
+        'modules_ms': dict(sorted(modules.items(), key=lambda item: -item[1])),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', default=list(APPS))
+    parser.add_argument('--runs', type=int, default=3, help="Fresh processes per app; medians are reported.")
+    parser.add_argument('--top', type=int, default=8, help="Modules to list per app.")
+    parser.add_argument('--check', action='store_true', help=f"Exit 1 if an app exceeds {os.path.basename(BUDGET_PATH)}.")
+    parser.add_argument('--budget', default=BUDGET_PATH)
+    parser.add_argument('--output', help="Write the full profile as JSON.")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        return
+
+    profile = {app: profile_app(app, args.runs) for app in args.apps}
+    for app, result in profile.items():
+        print(f"\n{app}: first render {result['first_render_ms']:.0f} ms, rerun {result['rerun_ms']:.0f} ms, "
+              f"app imports {result['import_ms']:.0f} ms")
+        for name, ms in list(result['modules_ms'].items())[:args.top]:
+            print(f"    {name:24s} {ms:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    if args.check:
+        with open(args.budget) as f:
+            budget = json.load(f)
+        failures = [
+            f"{app}: {metric} {profile[app][metric]:.0f} ms > budget {limit} ms"
+            for app, limits in budget.items() if app in profile
+            for metric, limit in limits.items() if profile[app][metric] > limit
+        ]
+        if failures:
+            print("\nStartup budget exceeded:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print("\nStartup within budget.")
+
+
+if __name__ == '__main__':
+    main()
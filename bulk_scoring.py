@@ -0,0 +1,147 @@
+import gzip
+import os
+import shutil
+import time
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+PREDICTION_COLUMN = 'Predicted_Salary'
+INTERVAL_COLUMNS = ('Predicted_Salary_Low', 'Predicted_Salary_High')
+UNSEEN_COLUMN = 'Unseen_Categories'
+
+# Rows per chunk; bounds peak memory independently of the file size
+DEFAULT_CHUNKSIZE = 50_000
+
+# Scored files are written next to app.py in static/, which Streamlit streams from disk
+# (server.enableStaticServing in .streamlit/config.toml), so they never pass through session memory
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Streamlit refuses to serve larger static files; bigger outputs are offered gzip-compressed
+MAX_STATIC_FILE_BYTES = 200 * 1024 * 1024
+# Files left behind by a server that did not shut down cleanly are removed after a day
+STALE_OUTPUT_S = 24 * 3600
+
+
+def prepare_features(chunk):
+    """Coerce a raw chunk to the dtypes the pipeline expects.
+
+    Returns the feature frame and a boolean mask of the rows that are complete
+    enough to score (the notebook drops incomplete rows before training).
+    """
+    missing = [col for col in FEATURE_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    features = chunk[FEATURE_COLUMNS].copy()
+    for col in NUMERIC_COLUMNS:
+        features[col] = pd.to_numeric(features[col], errors='coerce')
+    valid = features.notna().all(axis=1).to_numpy()
+    for col in CATEGORICAL_COLUMNS:
+        features[col] = features[col].astype(str)
+    return features, valid
+
+
+def score_chunk(model, chunk, intervals=None, schema=None, source=None):
+    """Score every valid row of `chunk` with a single `predict` call.
+
+    Rows that cannot be scored get NaN in the prediction column. With
+    `intervals` (a prediction_intervals.PredictionIntervals), the calibrated
+    low/high bounds are added as INTERVAL_COLUMNS. With `schema` (an
+    input_schema.InputSchema), categories are canonicalized before scoring and
+    the columns whose value the model has never seen are listed in UNSEEN_COLUMN.
+    With `source`, `model` is a predictor.SalaryPredictor and the rows are
+    scored with ``model.predict(..., source=source)``, so they are audit-logged.
+    """
+    features, valid = prepare_features(chunk)
+    if schema is not None:
+        features, unseen = schema.canonicalize(features)
+        labels = np.full(len(unseen), '', dtype=object)
+        for j, col in enumerate(CATEGORICAL_COLUMNS):
+            labels = np.where(unseen[:, j], np.where(labels == '', col, labels + ';' + col), labels)
+        chunk[UNSEEN_COLUMN] = labels
+
+    predictions = np.full(len(chunk), np.nan)
+    if valid.any():
+        batch = features[valid]
+        predictions[valid] = model.predict(batch) if source is None else model.predict(batch, source=source)
+    chunk[PREDICTION_COLUMN] = predictions
+    if intervals is not None:
+        low, high = intervals.interval(features, predictions)
+        chunk[INTERVAL_COLUMNS[0]], chunk[INTERVAL_COLUMNS[1]] = low, high
+    return chunk
+
+
+def iter_scored_chunks(model, source, chunksize=DEFAULT_CHUNKSIZE, intervals=None, schema=None, log_source=None):
+    """Yield scored DataFrame chunks read lazily from a CSV path or buffer."""
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        yield score_chunk(model, chunk, intervals, schema, log_source)
+
+
+def score_csv(model, source, destination, chunksize=DEFAULT_CHUNKSIZE, progress_callback=None, intervals=None,
+              schema=None, log_source=None):
+    """Stream `source` through the model and write the scored CSV to `destination`.
+
+    Only one chunk is held in memory at a time. `progress_callback`, if given,
+    is called after every chunk as ``progress_callback(rows_done, elapsed_seconds)``.
+    `log_source` is passed to score_chunk as its `source`. Returns the number
+    of rows written.
+    """
+    start = time.perf_counter()
+    rows_done = 0
+    for scored in iter_scored_chunks(model, source, chunksize=chunksize, intervals=intervals, schema=schema,
+                                     log_source=log_source):
+        scored.to_csv(destination, header=(rows_done == 0), index=False)
+        rows_done += len(scored)
+        if progress_callback is not None:
+            progress_callback(rows_done, time.perf_counter() - start)
+    return rows_done
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_stale_outputs(directory=STATIC_DIR, max_age_s=STALE_OUTPUT_S):
+    now = time.time()
+    for entry in os.scandir(directory):
+        if entry.name.startswith("scored-") and now - entry.stat().st_mtime > max_age_s:
+            _remove(entry.path)
+
+
+class ScoredFile:
+    """A scored CSV owned by one session, deleted when it is replaced or the session's state is collected.
+
+    The name is random, so the file's URL cannot be guessed by other sessions.
+    """
+
+    def __init__(self, directory=STATIC_DIR):
+        os.makedirs(directory, exist_ok=True)
+        remove_stale_outputs(directory)
+        self.directory = directory
+        self.name = f"scored-{uuid.uuid4().hex}.csv"
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.name)
+
+    def fit_static_limit(self, limit=MAX_STATIC_FILE_BYTES):
+        """Gzip the file (streaming, flat memory) if it is too large to be served as is."""
+        if os.path.getsize(self.path) <= limit:
+            return
+        plain_path = self.path
+        with open(plain_path, "rb") as src, gzip.open(plain_path + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        self._finalizer()
+        self.name += ".gz"
+        self._finalizer = weakref.finalize(self, _remove, self.path)
+
+    def remove(self):
+        self._finalizer()
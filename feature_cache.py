@@ -0,0 +1,230 @@
+"""Pre-encoded training matrix, cached on disk and shared by training runs and workers.
+
+The data file is encoded once into a CSR matrix: the raw numeric columns
+followed by one one-hot column per category. It is stored with the target
+under ``.feature_cache/<key>/`` as plain ``.npy`` arrays that are opened with
+``mmap_mode='r'``, so every run and every joblib worker maps the same pages
+instead of re-reading the CSV or receiving a pickled copy. The key is a hash of
+the data file's contents and of the feature definition (columns, preprocessor
+parameters, format version); editing either produces a new entry and the
+stale one is removed.
+
+Only the part of the ColumnTransformer that does not depend on which rows are
+training rows is cached. ``FeatureMatrix.split`` fits the numeric transformer
+(StandardScaler) on the training rows of each split and applies it, exactly as
+fitting the pipeline's preprocessor on those rows would, and returns a dense
+array whenever ColumnTransformer would.
+
+    features = load_features("salary_prediction_data.csv", build_preprocessor(), load_training_data)
+    X_train, y_train, X_test, y_test = features.split(train_rows, test_rows)
+"""
+import errno
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS, TARGET_COLUMN
+
+CACHE_DIR = ".feature_cache"
+FORMAT_VERSION = 1
+ARRAYS = ('data', 'indices', 'indptr', 'target', 'codes')
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _transformers(preprocessor):
+    """The (numeric, categorical) transformers of an unfitted preprocessor, checked against the cache layout."""
+    from sklearn.preprocessing import OneHotEncoder
+
+    transformers = {name: (transformer, list(columns)) for name, transformer, columns in preprocessor.transformers}
+    numeric, numeric_columns = transformers.get('num', (None, None))
+    categorical, categorical_columns = transformers.get('cat', (None, None))
+    if numeric_columns != NUMERIC_COLUMNS or categorical_columns != CATEGORICAL_COLUMNS or len(transformers) != 2:
+        raise ValueError("Expected 'num' and 'cat' transformers over schema.NUMERIC_COLUMNS and CATEGORICAL_COLUMNS.")
+    if not isinstance(categorical, OneHotEncoder) or categorical.drop is not None or categorical.categories != 'auto':
+        raise ValueError("The categorical transformer must be OneHotEncoder(handle_unknown='ignore') without drop.")
+    return numeric, categorical
+
+
+def feature_config(preprocessor):
+    """Everything about the feature definition that changes the encoded matrix."""
+    numeric, categorical = _transformers(preprocessor)
+    return {
+        'format_version': FORMAT_VERSION, 'feature_columns': FEATURE_COLUMNS, 'target': TARGET_COLUMN,
+        'numeric': [type(numeric).__name__, repr(sorted(numeric.get_params().items()))],
+        'categorical': [type(categorical).__name__, repr(sorted(categorical.get_params().items()))],
+        'sparse_threshold': preprocessor.sparse_threshold,
+    }
+
+
+def cache_key(data_path, preprocessor):
+    config = json.dumps(feature_config(preprocessor), sort_keys=True)
+    return hashlib.sha256((_file_sha256(data_path) + config).encode()).hexdigest()[:20]
+
+
+class FeatureMatrix:
+    """Memory-mapped encoded rows: raw numerics then one-hot columns (CSR), the target and category codes."""
+
+    def __init__(self, path, meta, matrix, target, codes):
+        self.path = path
+        self.meta = meta
+        self.matrix = matrix
+        self.target = target
+        self.codes = codes
+        self.vocabularies = meta['vocabularies']
+        self.n_numeric = len(NUMERIC_COLUMNS)
+
+    @classmethod
+    def open(cls, path):
+        from scipy.sparse import csr_matrix
+
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in ARRAYS}
+        matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(meta['shape']), copy=False)
+        return cls(path, meta, matrix, arrays['target'], arrays['codes'])
+
+    def __reduce__(self):
+        # Workers re-open the memory map rather than receiving a pickled copy of the arrays
+        return type(self).open, (self.path,)
+
+    @property
+    def n_rows(self):
+        return self.matrix.shape[0]
+
+    def category_values(self, col, rows):
+        """The original values of categorical column `col` for `rows`."""
+        vocabulary = np.asarray(self.vocabularies[col], dtype=object)
+        return vocabulary[np.asarray(self.codes[rows, CATEGORICAL_COLUMNS.index(col)])]
+
+    def split(self, train_rows, test_rows, numeric_transformer=None):
+        """``(X_train, y_train, X_test, y_test)`` as the preprocessor fitted on `train_rows` would encode them."""
+        from sklearn.base import clone
+        from sklearn.preprocessing import StandardScaler
+
+        numeric = clone(numeric_transformer if numeric_transformer is not None else StandardScaler())
+        train = self._encode(self.matrix[train_rows], numeric, fit=True)
+        test = self._encode(self.matrix[test_rows], numeric, fit=False)
+        return train, np.asarray(self.target[train_rows]), test, np.asarray(self.target[test_rows])
+
+    def _encode(self, rows, numeric, fit):
+        from scipy.sparse import csr_matrix, hstack
+
+        # Column-major like the DataFrame block ColumnTransformer hands the scaler, so the
+        # variance is summed in the same order and the scaled values match to the last bit
+        raw = rows[:, :self.n_numeric].toarray(order='F')
+        scaled = numeric.fit_transform(raw) if fit else numeric.transform(raw)
+        encoded = hstack([csr_matrix(scaled), rows[:, self.n_numeric:]], format='csr')
+        # Same rule as ColumnTransformer: dense unless the result is sparse enough
+        density = encoded.nnz / max(1, encoded.shape[0] * encoded.shape[1])
+        return encoded.toarray() if density >= self.meta['config']['sparse_threshold'] else encoded
+
+    def fitted_preprocessor(self, preprocessor, train_rows):
+        """Fit `preprocessor` so that it encodes new rows exactly like ``split(train_rows, ...)`` did.
+
+        The one-hot vocabularies are pinned to the cached ones, so the column
+        layout matches even when a category is absent from the training rows.
+        """
+        import pandas as pd
+        from sklearn.base import clone
+
+        preprocessor = clone(preprocessor)
+        categories = [list(self.vocabularies[col]) for col in CATEGORICAL_COLUMNS]
+        preprocessor.set_params(cat__categories=categories)
+        frame = pd.DataFrame(self.matrix[train_rows][:, :self.n_numeric].toarray(order='F'), columns=NUMERIC_COLUMNS)
+        # The encoder's categories are fixed, so any known value will do for the categorical columns
+        for col, vocabulary in zip(CATEGORICAL_COLUMNS, categories):
+            frame[col] = vocabulary[0]
+        return preprocessor.fit(frame[FEATURE_COLUMNS])
+
+
+def build_features(data_path, preprocessor, path, load_data):
+    """Encode `data_path`, read with ``load_data(path) -> (X, y)``, and write the cache entry at `path` atomically."""
+    from scipy.sparse import csr_matrix
+
+    x, y = load_data(data_path)
+    numeric = x[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+    vocabularies, codes = {}, []
+    for col in CATEGORICAL_COLUMNS:
+        values = x[col].astype(str).to_numpy()
+        vocabulary, code = np.unique(values, return_inverse=True)
+        vocabularies[col] = vocabulary.tolist()
+        codes.append(code)
+    codes = np.stack(codes, axis=1).astype(np.int32)
+
+    # Column of each row's one-hot entry per categorical column, after the numeric columns
+    offsets = np.cumsum([len(NUMERIC_COLUMNS)] + [len(vocabularies[col]) for col in CATEGORICAL_COLUMNS])[:-1]
+    n_rows, n_columns = len(x), len(NUMERIC_COLUMNS) + sum(len(v) for v in vocabularies.values())
+    per_row = len(NUMERIC_COLUMNS) + len(CATEGORICAL_COLUMNS)
+    indices = np.empty((n_rows, per_row), dtype=np.int32)
+    indices[:, :len(NUMERIC_COLUMNS)] = np.arange(len(NUMERIC_COLUMNS))
+    indices[:, len(NUMERIC_COLUMNS):] = codes + offsets
+    data = np.hstack([numeric, np.ones((n_rows, len(CATEGORICAL_COLUMNS)))])
+    # Explicit zeros in the numeric columns are kept, so every row has the same layout
+    matrix = csr_matrix((data.ravel(), indices.ravel(), np.arange(0, n_rows * per_row + 1, per_row, dtype=np.int64)),
+                        shape=(n_rows, n_columns))
+
+    arrays = {'data': matrix.data, 'indices': matrix.indices, 'indptr': matrix.indptr.astype(np.int64),
+              'target': y.to_numpy(dtype=np.float64), 'codes': codes}
+    meta = {
+        'data_path': os.path.abspath(data_path), 'data_sha256': _file_sha256(data_path),
+        'config': feature_config(preprocessor),
+        'shape': list(matrix.shape), 'vocabularies': vocabularies,
+        'feature_names': NUMERIC_COLUMNS + [f"{col}_{value}" for col in CATEGORICAL_COLUMNS for value in vocabularies[col]],
+    }
+    staging = f"{path}.tmp{os.getpid()}"
+    os.makedirs(staging, exist_ok=True)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.rename(staging, path)
+        except OSError as e:
+            # Another process built the same entry first (Linux reports ENOTEMPTY for a directory)
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+            shutil.rmtree(staging, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _remove_stale(cache_dir, data_path, keep):
+    data_path = os.path.abspath(data_path)
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name == keep or ".tmp" in name:
+            continue
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                stale = json.load(f).get('data_path') == data_path
+        except (OSError, ValueError):
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_features(data_path, preprocessor, load_data, cache_dir=CACHE_DIR):
+    """The cached FeatureMatrix for `data_path` and `preprocessor`, encoding it first if needed.
+
+    `load_data` reads the data file as ``(X, y)``, the same rows the caller splits
+    (train.load_training_data).
+    """
+    key = cache_key(data_path, preprocessor)
+    path = os.path.join(cache_dir, key)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        os.makedirs(cache_dir, exist_ok=True)
+        build_features(data_path, preprocessor, path, load_data)
+        _remove_stale(cache_dir, data_path, keep=key)
+    return FeatureMatrix.open(path)
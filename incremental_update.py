@@ -0,0 +1,289 @@
+"""Incremental updates of the linear model from new labeled rows.
+
+The served model is ``StandardScaler + OneHotEncoder -> LinearRegression`` on a
+fixed design, so the least-squares fit only depends on a few running sums over
+the raw design matrix A = [Experience, Age, one-hot columns]:
+
+    n, sum(A), AᵀA, Aᵀy, sum(y), sum(y²)
+
+Feature means and variances (for the scaler) follow from sum(A) and diag(AᵀA).
+Appending a batch costs O(batch * p²); re-solving costs O(p³) with p = 15 here,
+so an update never rereads history. The solve reproduces what sklearn computes
+when the pipeline is fit on all rows seen so far.
+
+    python incremental_update.py init --data salary_prediction_data.csv
+    python incremental_update.py update new_salaries.csv
+
+The statistics record the SHA-256 of every file folded into them, so running
+``update`` again with a file that was already applied skips it.
+"""
+import argparse
+import hashlib
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from prediction_intervals import analytic_spec, save_intervals
+from predictor import MODEL_PATH
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS, TARGET_COLUMN
+
+STATS_PATH = "model_stats.npz"
+
+
+class SufficientStats:
+    def __init__(self, vocabularies):
+        self.vocabularies = {col: [str(v) for v in vocabularies[col]] for col in CATEGORICAL_COLUMNS}
+        p = len(NUMERIC_COLUMNS) + sum(len(v) for v in self.vocabularies.values())
+        self.n = 0
+        self.sum_x = np.zeros(p)
+        self.xtx = np.zeros((p, p))
+        self.xty = np.zeros(p)
+        self.sum_y = 0.0
+        self.sum_yy = 0.0
+        self.unknown_categories = 0  # rows with a category outside the fixed vocabulary
+        self.applied = []  # SHA-256 of every data file already folded in
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Empty statistics using the category vocabularies of a fitted pipeline."""
+        encoder = pipeline.named_steps['preprocessor'].named_transformers_['cat']
+        return cls(dict(zip(CATEGORICAL_COLUMNS, encoder.categories_)))
+
+    @property
+    def n_features(self):
+        return len(self.sum_x)
+
+    @property
+    def feature_means(self):
+        return self.sum_x / self.n
+
+    @property
+    def feature_variances(self):
+        # Population variance, as StandardScaler uses
+        return np.maximum(np.diag(self.xtx) / self.n - self.feature_means ** 2, 0.0)
+
+    def design_matrix(self, x):
+        """Raw design matrix for a feature frame: numeric columns then one-hot blocks.
+
+        Categorical columns are handled as compact category codes: only the
+        distinct values of a chunk are matched against the vocabulary, never
+        every row's string.
+        """
+        A = np.zeros((len(x), self.n_features))
+        for i, col in enumerate(NUMERIC_COLUMNS):
+            A[:, i] = pd.to_numeric(x[col]).to_numpy(dtype=float)
+        offset = len(NUMERIC_COLUMNS)
+        rows = np.arange(len(x))
+        for col in CATEGORICAL_COLUMNS:
+            vocabulary = self.vocabularies[col]
+            codes = self._vocabulary_codes(x[col], vocabulary)
+            known = codes >= 0
+            self.unknown_categories += int((~known).sum())
+            A[rows[known], offset + codes[known]] = 1.0
+            offset += len(vocabulary)
+        return A
+
+    @staticmethod
+    def _vocabulary_codes(values, vocabulary):
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str).astype('category')
+        mapping = pd.Index(vocabulary).get_indexer(values.cat.categories.astype(str))
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, mapping[codes], -1)
+
+    def grow_vocabulary(self, batch):
+        """Add categories first seen in `batch`, keeping each vocabulary sorted like OneHotEncoder."""
+        offset = len(NUMERIC_COLUMNS)
+        for col in CATEGORICAL_COLUMNS:
+            values = batch[col]
+            seen = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else values.unique()
+            vocabulary = self.vocabularies[col]
+            for value in sorted(set(map(str, seen)) - set(vocabulary)):
+                position = int(np.searchsorted(vocabulary, value))
+                vocabulary.insert(position, value)
+                index = offset + position
+                self.sum_x = np.insert(self.sum_x, index, 0.0)
+                self.xty = np.insert(self.xty, index, 0.0)
+                self.xtx = np.insert(np.insert(self.xtx, index, 0.0, axis=0), index, 0.0, axis=1)
+            offset += len(vocabulary)
+
+    def update(self, batch, grow_vocabulary=False):
+        """Fold a labeled batch (DataFrame with the feature columns and Salary) into the sums.
+
+        With `grow_vocabulary`, unseen categories extend the design instead of
+        being ignored; used when training from scratch.
+        """
+        batch = batch.dropna(subset=FEATURE_COLUMNS + [TARGET_COLUMN])
+        if batch.empty:
+            return self
+        if grow_vocabulary:
+            self.grow_vocabulary(batch)
+        A = self.design_matrix(batch)
+        y = pd.to_numeric(batch[TARGET_COLUMN]).to_numpy(dtype=float)
+        self.n += len(y)
+        self.sum_x += A.sum(axis=0)
+        self.xtx += A.T @ A
+        self.xty += A.T @ y
+        self.sum_y += y.sum()
+        self.sum_yy += y @ y
+        return self
+
+    def _solve_standardized(self):
+        n_num = len(NUMERIC_COLUMNS)
+        mean = self.feature_means
+        y_mean = self.sum_y / self.n
+
+        # Centered Gram matrix and cross-products, then rescale the numeric block
+        # to the standardized space the LinearRegression sees in the pipeline
+        gram = self.xtx - self.n * np.outer(mean, mean)
+        cross = self.xty - self.n * mean * y_mean
+        scale = np.ones(self.n_features)
+        scale[:n_num] = np.sqrt(self.feature_variances[:n_num])
+        scale[:n_num][scale[:n_num] == 0] = 1.0
+        gram = gram / np.outer(scale, scale)
+        cross = cross / scale
+
+        # Minimum-norm least-squares solution, like LinearRegression's lstsq
+        coef = np.linalg.pinv(gram, hermitian=True) @ cross
+        return coef, gram, cross, scale
+
+    def solve(self):
+        """Return a fitted sklearn pipeline equivalent to fitting on every row seen so far."""
+        if self.n == 0:
+            raise ValueError("No rows have been added yet.")
+        n_num = len(NUMERIC_COLUMNS)
+        coef, _, _, scale = self._solve_standardized()
+        transformed_mean = self.feature_means / scale
+        transformed_mean[:n_num] = 0.0
+        intercept = self.sum_y / self.n - transformed_mean @ coef
+        return self._build_pipeline(coef, intercept, self.feature_means[:n_num], scale[:n_num] ** 2, scale[:n_num])
+
+    def _residual_sum_of_squares(self):
+        coef, gram, cross, _ = self._solve_standardized()
+        total = self.sum_yy - self.sum_y ** 2 / self.n
+        return total - 2 * coef @ cross + coef @ gram @ coef, total, gram
+
+    def r2(self):
+        """In-sample R² of the least-squares fit, computed from the sums alone."""
+        residual, total, _ = self._residual_sum_of_squares()
+        return 1.0 - residual / total if total > 0 else 0.0
+
+    def residual_std(self):
+        """Unbiased residual standard deviation, for analytic prediction intervals."""
+        residual, _, gram = self._residual_sum_of_squares()
+        dof = self.n - np.linalg.matrix_rank(gram, hermitian=True) - 1
+        return float(np.sqrt(max(residual, 0.0) / dof)) if dof > 0 else float('nan')
+
+    def _build_pipeline(self, coef, intercept, num_mean, num_var, num_scale):
+        from sklearn.linear_model import LinearRegression
+        from sklearn.pipeline import Pipeline
+
+        from train import build_preprocessor
+
+        # Fit the transformers on a tiny frame holding every category once, then
+        # install the running statistics so the artifact matches the full-history fit
+        size = max(len(v) for v in self.vocabularies.values())
+        skeleton = pd.DataFrame({col: [0.0] * size for col in NUMERIC_COLUMNS})
+        for col, vocabulary in self.vocabularies.items():
+            skeleton[col] = [vocabulary[i % len(vocabulary)] for i in range(size)]
+        preprocessor = build_preprocessor().fit(skeleton[FEATURE_COLUMNS])
+        scaler = preprocessor.named_transformers_['num']
+        scaler.mean_, scaler.var_, scaler.scale_ = num_mean, num_var, num_scale
+        scaler.n_samples_seen_ = self.n
+
+        regressor = LinearRegression()
+        regressor.coef_ = coef
+        regressor.intercept_ = float(intercept)
+        regressor.n_features_in_ = len(coef)
+        return Pipeline(steps=[('preprocessor', preprocessor), ('regressor', regressor)])
+
+    def save(self, path=STATS_PATH):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, n=self.n, sum_x=self.sum_x, xtx=self.xtx, xty=self.xty,
+                 sum_y=self.sum_y, sum_yy=self.sum_yy, unknown_categories=self.unknown_categories,
+                 applied=np.array(self.applied, dtype=str),
+                 feature_means=self.feature_means if self.n else self.sum_x,
+                 feature_variances=self.feature_variances if self.n else self.sum_x,
+                 **{f"vocabulary_{col}": np.array(v) for col, v in self.vocabularies.items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        with np.load(path) as data:
+            stats = cls({col: data[f"vocabulary_{col}"].tolist() for col in CATEGORICAL_COLUMNS})
+            stats.n = int(data['n'])
+            stats.sum_x, stats.xtx, stats.xty = data['sum_x'], data['xtx'], data['xty']
+            stats.sum_y, stats.sum_yy = float(data['sum_y']), float(data['sum_yy'])
+            stats.unknown_categories = int(data['unknown_categories'])
+            stats.applied = data['applied'].tolist() if 'applied' in data else []
+        return stats
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def add_csv(stats, path, chunksize=100_000):
+    """Fold the rows of `path` into `stats`; returns False if that file was already applied."""
+    digest = file_sha256(path)
+    if digest in stats.applied:
+        return False
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        stats.update(chunk)
+    stats.applied.append(digest)
+    return True
+
+
+def publish(stats, model_path=MODEL_PATH, stats_path=STATS_PATH):
+    """Solve and atomically replace the model file; running apps pick it up on their next request.
+
+    The statistics are saved last: if anything fails before that, the old
+    statistics are still on disk and re-running the same update is correct.
+    """
+    pipeline = stats.solve()
+    tmp_model = model_path + ".tmp"
+    joblib.dump(pipeline, tmp_model)
+    save_intervals(analytic_spec(stats.residual_std(), stats.n), model_path, source_path=tmp_model)
+    os.replace(tmp_model, model_path)
+    stats.save(stats_path)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update best_model.pkl from new labeled rows.")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--stats', default=STATS_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    init = commands.add_parser('init', help="Build the statistics from the full history once.")
+    init.add_argument('--data', default="salary_prediction_data.csv")
+    update = commands.add_parser('update', help="Append new labeled CSV files and re-solve.")
+    update.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        stats = SufficientStats.from_pipeline(joblib.load(args.model))
+        files = [args.data]
+    else:
+        stats = SufficientStats.load(args.stats)
+        files = args.files
+    n_before = stats.n
+    for path in files:
+        if not add_csv(stats, path):
+            print(f"Skipping '{path}': it is already included in '{args.stats}'.")
+    if stats.n == n_before and args.command == 'update':
+        print("Nothing new to publish.")
+        return
+    publish(stats, args.model, args.stats)
+    print(f"Added {stats.n - n_before:,} rows ({stats.n:,} total); published '{args.model}' and '{args.stats}'.")
+    if stats.unknown_categories:
+        print(f"Note: {stats.unknown_categories:,} category values were outside the model vocabulary and ignored.")
+
+
+if __name__ == '__main__':
+    main()
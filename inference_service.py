@@ -0,0 +1,253 @@
+"""Standalone HTTP JSON service for salary predictions.
+
+Serves the same model the Streamlit apps load (through ``predictor``) using
+only asyncio. Concurrent requests are gathered into micro-batches so each batch
+is scored with a single ``predict`` call.
+
+    python inference_service.py --port 8000 --max-batch-size 64 --max-wait-ms 2
+
+Routes:
+    GET  /healthz   process is up
+    GET  /readyz    model is loaded and can serve (503 otherwise)
+    POST /predict   {"Education": ..., ...} or {"instances": [{...}, ...]}
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from predictor import MODEL_PATH, get_predictor
+from schema import FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class MicroBatcher:
+    """Collects rows from concurrent requests and scores them in one predict call.
+
+    A batch is flushed once it holds `max_batch_size` rows or `max_wait_ms` has
+    passed since its first request arrived, whichever comes first.
+    """
+
+    def __init__(self, predict, max_batch_size=64, max_wait_ms=2.0):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, rows):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((rows, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            size = len(pending[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            # Scored inline: the compiled kernel takes microseconds, and requests
+            # arriving meanwhile simply queue up for the next batch
+            rows = [row for item_rows, _ in pending for row in item_rows]
+            try:
+                predictions = self.predict(rows)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(rows)
+            offset = 0
+            for item_rows, future in pending:
+                if not future.done():
+                    future.set_result([float(p) for p in predictions[offset:offset + len(item_rows)]])
+                offset += len(item_rows)
+
+
+def parse_instance(instance):
+    if not isinstance(instance, dict):
+        raise ValueError("Each instance must be a JSON object.")
+    missing = [col for col in FEATURE_COLUMNS if col not in instance]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    row = []
+    for col in FEATURE_COLUMNS:
+        value = instance[col]
+        if col in NUMERIC_COLUMNS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"Field '{col}' must be a number.")
+            # json.loads accepts NaN and Infinity, which would come back as an invalid JSON prediction
+            if not math.isfinite(value):
+                raise ValueError(f"Field '{col}' must be a finite number.")
+        else:
+            value = str(value)
+        row.append(value)
+    return tuple(row)
+
+
+class InferenceService:
+    def __init__(self, model_path=MODEL_PATH, max_batch_size=64, max_wait_ms=2.0):
+        self.model_path = model_path
+        self.batcher = MicroBatcher(self._predict, max_batch_size, max_wait_ms)
+        self.started = time.time()
+        self._loaded = False
+
+    def _predict(self, rows):
+        return get_predictor(self.model_path).predict(rows, source='service')
+
+    async def ensure_loaded(self):
+        """Load the model on a worker thread; the first load can take seconds and must not block the event loop."""
+        if not self._loaded:
+            await asyncio.to_thread(get_predictor, self.model_path)
+            self._loaded = True
+
+    def readiness(self):
+        try:
+            predictor = get_predictor(self.model_path)
+        except Exception as e:
+            return 503, {'status': 'unavailable', 'error': str(e)}
+        status = {'status': 'ready', 'model_sha256': predictor.fingerprint['sha256'],
+                  'batches': self.batcher.batches, 'rows': self.batcher.rows}
+        if predictor.shadow is not None:
+            status['shadow'] = predictor.shadow.summary()
+        return 200, status
+
+    async def handle(self, method, path, body):
+        if path == '/healthz':
+            return 200, {'status': 'ok', 'uptime_s': round(time.time() - self.started, 3)}
+        if path == '/readyz':
+            return await asyncio.to_thread(self.readiness)
+        if path != '/predict':
+            return 404, {'error': f"No route for {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST for /predict."}
+
+        try:
+            payload = json.loads(body or b'null')
+            batch = isinstance(payload, dict) and 'instances' in payload
+            instances = payload['instances'] if batch else [payload]
+            if not isinstance(instances, list) or not instances:
+                raise ValueError("'instances' must be a non-empty list.")
+            rows = [parse_instance(instance) for instance in instances]
+        except ValueError as e:
+            return 400, {'error': str(e)}
+
+        try:
+            await self.ensure_loaded()
+        except Exception as e:
+            return 503, {'error': f"Model unavailable: {e}"}
+        predictions = await self.batcher.submit(rows)
+        if batch:
+            return 200, {'predictions': predictions}
+        return 200, {'prediction': predictions[0]}
+
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise ValueError("negative Content-Length")
+                except ValueError:
+                    status, payload, keep_alive = 400, {'error': "Malformed HTTP request."}, False
+                else:
+                    if length > MAX_BODY_BYTES:
+                        status, payload = 413, {'error': "Request body too large."}
+                        keep_alive = False
+                    else:
+                        body = await reader.readexactly(length) if length else b''
+                        try:
+                            status, payload = await self.handle(method, target.split('?', 1)[0], body)
+                        except Exception as e:
+                            status, payload = 500, {'error': str(e)}
+                        connection = headers.get('connection', '').lower()
+                        keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+
+                try:
+                    data = json.dumps(payload, allow_nan=False).encode()
+                except ValueError:
+                    status, data = 500, json.dumps({'error': "The model returned a non-finite prediction."}).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, **kwargs):
+    service = InferenceService(**kwargs)
+    await asyncio.to_thread(service.readiness)  # load the model before accepting traffic
+    service.batcher.start()
+    server = await asyncio.start_server(service.serve_connection, host, port)
+    print(f"Serving {service.model_path} on http://{host}:{port} "
+          f"(max batch {service.batcher.max_batch_size}, max wait {service.batcher.max_wait * 1000:g} ms)")
+    async with server:
+        try:
+            await server.serve_forever()
+        finally:
+            await service.batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP JSON service for salary predictions.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--max-batch-size', type=int, default=64, help="Rows per predict call.")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0, help="How long a batch waits to fill up.")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, model_path=args.model,
+                          max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
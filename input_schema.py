@@ -0,0 +1,140 @@
+"""Validation and canonicalization of model inputs, shared by the apps and batch paths.
+
+The accepted categories come from the fitted encoder's vocabularies, so the
+schema always matches the model being served. Values are matched exactly,
+then case- and whitespace-insensitively, then through ALIASES (e.g.
+"Software Engineer" -> "Engineer"). Anything still outside the vocabulary is
+flagged as unseen: the model would silently ignore it
+(``OneHotEncoder(handle_unknown='ignore')``).
+
+Batches are canonicalized per distinct value rather than per row, so a large
+file costs one hash-based factorization per column.
+"""
+import re
+
+import numpy as np
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS
+
+# Common spellings and job titles, mapped onto the training vocabulary.
+# Keys are matched after normalize_value(); targets outside the vocabulary are ignored.
+ALIASES = {
+    'Education': {
+        'high-school': 'High School', 'highschool': 'High School', 'secondary': 'High School',
+        "bachelor's": 'Bachelor', 'bachelors': 'Bachelor', 'bsc': 'Bachelor', 'ba': 'Bachelor', 'undergraduate': 'Bachelor',
+        "master's": 'Master', 'masters': 'Master', 'msc': 'Master', 'mba': 'Master',
+        'doctorate': 'PhD', 'ph.d.': 'PhD', 'ph.d': 'PhD', 'doctoral': 'PhD',
+    },
+    'Location': {
+        'city': 'Urban', 'metro': 'Urban', 'metropolitan': 'Urban',
+        'suburb': 'Suburban', 'suburbs': 'Suburban',
+        'countryside': 'Rural', 'village': 'Rural',
+    },
+    'Job_Title': {
+        'software engineer': 'Engineer', 'software developer': 'Engineer', 'developer': 'Engineer',
+        'data engineer': 'Engineer', 'engineering': 'Engineer',
+        'data scientist': 'Analyst', 'data analyst': 'Analyst', 'financial analyst': 'Analyst',
+        'business analyst': 'Analyst',
+        'product manager': 'Manager', 'project manager': 'Manager', 'engineering manager': 'Manager',
+        'team lead': 'Manager',
+        'head of': 'Director', 'vp': 'Director', 'vice president': 'Director',
+    },
+    'Gender': {
+        'm': 'Male', 'man': 'Male',
+        'f': 'Female', 'woman': 'Female',
+    },
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_value(value):
+    return _WHITESPACE.sub(" ", str(value)).strip().casefold()
+
+
+class InputSchema:
+    def __init__(self, vocabularies, aliases=ALIASES):
+        self.vocabularies = {col: [str(v) for v in vocabularies[col]] for col in CATEGORICAL_COLUMNS}
+        self._positions = [(FEATURE_COLUMNS.index(col), col) for col in CATEGORICAL_COLUMNS]
+        # value -> canonical value, for exact spellings, normalized spellings and aliases
+        self._lookup = {}
+        for col, vocabulary in self.vocabularies.items():
+            table = {normalize_value(alias): target for alias, target in aliases.get(col, {}).items()
+                     if target in vocabulary}
+            table.update({normalize_value(value): value for value in vocabulary})
+            table.update({value: value for value in vocabulary})
+            self._lookup[col] = table
+
+    def canonical_value(self, col, value):
+        """The vocabulary value `value` stands for, or None if it is unseen."""
+        table = self._lookup[col]
+        text = str(value)
+        canonical = table.get(text)
+        if canonical is None:
+            canonical = table.get(normalize_value(text))
+        return canonical
+
+    def canonicalize_one(self, row):
+        """Return ``(canonical_row, unseen_columns)`` for a row in FEATURE_COLUMNS order.
+
+        Unseen values are passed through unchanged.
+        """
+        row = list(row)
+        unseen = []
+        for index, col in self._positions:
+            canonical = self.canonical_value(col, row[index])
+            if canonical is None:
+                unseen.append(col)
+            else:
+                row[index] = canonical
+        return tuple(row), unseen
+
+    def canonicalize(self, X):
+        """Vectorized canonicalize for a DataFrame, a 2-D array or a sequence of row tuples.
+
+        Returns ``(canonical, unseen)``: the canonical rows (a DataFrame for a
+        DataFrame input, else a 2-D object array) and a boolean array of shape
+        ``(n_rows, len(CATEGORICAL_COLUMNS))`` marking unseen values.
+        """
+        import pandas as pd
+
+        if hasattr(X, 'columns'):
+            canonical = X.copy()
+            columns = {col: X[col].to_numpy() for col in CATEGORICAL_COLUMNS}
+        else:
+            canonical = np.array(X, dtype=object)
+            if canonical.ndim == 1:
+                canonical = canonical.reshape(1, -1)
+            columns = {col: canonical[:, index] for index, col in self._positions}
+
+        unseen = np.zeros((len(canonical), len(CATEGORICAL_COLUMNS)), dtype=bool)
+        for j, (index, col) in enumerate(self._positions):
+            # Map each distinct value once, then broadcast back through the codes
+            codes, uniques = pd.factorize(columns[col])
+            mapped = [self.canonical_value(col, value) for value in uniques]
+            known = np.array([value is not None for value in mapped] + [True], dtype=bool)
+            replacement = np.array([m if m is not None else u for m, u in zip(mapped, uniques)] + [None], dtype=object)
+            # codes == -1 (missing values) index the trailing sentinel and stay missing
+            values = np.where(codes >= 0, replacement[codes], columns[col])
+            unseen[:, j] = ~known[codes]
+            if hasattr(canonical, 'columns'):
+                canonical[col] = values
+            else:
+                canonical[:, index] = values
+        return canonical, unseen
+
+
+def render_input_notes(schema, row):
+    """Explain how the submitted `row` was interpreted: aliases applied and unseen categories."""
+    import streamlit as st
+
+    canonical, unseen = schema.canonicalize_one(row)
+    labels = {col: col.replace('_', ' ') for col in FEATURE_COLUMNS}
+    mapped = [f"{labels[col]} '{row[i]}' as '{canonical[i]}'" for i, col in enumerate(FEATURE_COLUMNS)
+              if col in CATEGORICAL_COLUMNS and col not in unseen and str(row[i]) != canonical[i]]
+    if mapped:
+        st.info("Interpreted " + ", ".join(mapped) + ".")
+    for col in unseen:
+        value = row[FEATURE_COLUMNS.index(col)]
+        st.warning(f"{labels[col]} '{value}' was not in the training data, so it does not affect the prediction. "
+                   f"Known values: {', '.join(schema.vocabularies[col])}.")
@@ -0,0 +1,156 @@
+"""Per-stage latency histograms for the prediction path of the apps.
+
+A single process-wide registry is shared by every session. Each stage keeps
+lifetime Prometheus-style bucket counts plus a rolling window of recent samples
+for percentiles, so the sidebar panel reflects current behaviour.
+
+    with time_stage("app1", "predict"):
+        predicted_salary = ...
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Bucket upper bounds in seconds (100 us .. 5 s), plus an implicit +Inf bucket
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+WINDOW_SIZE = 1000
+
+
+class LatencyHistogram:
+    """Thread-safe: sessions observe while the sidebar (or the shadow scorer) reads."""
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.window = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.window.append(seconds)
+
+    def snapshot(self):
+        """``(count, recent samples)`` copied under the lock, so readers never iterate a deque being appended to."""
+        with self._lock:
+            return self.count, list(self.window)
+
+    def lifetime(self):
+        """``(bucket counts, sum, count)`` copied together under the lock, so an export is self-consistent."""
+        with self._lock:
+            return list(self.bucket_counts), self.total, self.count
+
+    def summary(self):
+        count, recent = self.snapshot()
+        recent.sort()
+        if not recent:
+            return {'count': count}
+
+        def pct(q):
+            return recent[min(len(recent) - 1, int(q * len(recent)))]
+
+        return {
+            'count': count,
+            'mean_ms': sum(recent) / len(recent) * 1e3,
+            'p50_ms': pct(0.50) * 1e3,
+            'p95_ms': pct(0.95) * 1e3,
+            'p99_ms': pct(0.99) * 1e3,
+            'max_ms': recent[-1] * 1e3,
+        }
+
+    def window_buckets(self):
+        counts = [0] * (len(BUCKETS) + 1)
+        for seconds in self.snapshot()[1]:
+            counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        return counts
+
+
+class LatencyRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}  # (app, stage) -> LatencyHistogram
+
+    def observe(self, app, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get((app, stage))
+            if histogram is None:
+                histogram = self._histograms[(app, stage)] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time_stage(self, app, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(app, stage, time.perf_counter() - start)
+
+    def stages(self, app):
+        with self._lock:
+            return {stage: h for (name, stage), h in self._histograms.items() if name == app}
+
+    def prometheus_text(self):
+        """Render every histogram in the Prometheus text exposition format."""
+        name = "salary_app_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each stage of the prediction path.", f"# TYPE {name} histogram"]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for (app, stage), h in histograms:
+            bucket_counts, total, count = h.lifetime()
+            labels = f'app="{app}",stage="{stage}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = LatencyRegistry()
+time_stage = registry.time_stage
+
+
+def _format_cell(value):
+    if value is None:
+        return ""
+    return f"{value:.2f}" if isinstance(value, float) else value
+
+
+def _markdown_table(header, rows):
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(str(cell) for cell in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_diagnostics(app):
+    """Sidebar panel with rolling per-stage latencies and a Prometheus export."""
+    import streamlit as st
+
+    stages = registry.stages(app)
+    with st.sidebar.expander("⏱️ Diagnostics"):
+        if not stages:
+            st.caption("No predictions timed yet in this process.")
+            return
+        # Markdown tables: st.dataframe would import pandas, which app2 times on its first render
+        summaries = {stage: h.summary() for stage, h in stages.items()}
+        columns = ['count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+        st.markdown(_markdown_table(['stage'] + columns, [
+            [stage] + [_format_cell(summary.get(col)) for col in columns] for stage, summary in summaries.items()
+        ]))
+
+        # Rolling histogram: recent samples per latency bucket, empty buckets hidden
+        labels = [f"≤{bound * 1e3:g}ms" for bound in BUCKETS] + [f">{BUCKETS[-1] * 1e3:g}ms"]
+        counts = {stage: h.window_buckets() for stage, h in stages.items()}
+        used = [i for i in range(len(labels)) if any(c[i] for c in counts.values())]
+        if used:
+            st.markdown(_markdown_table(['stage'] + [labels[i] for i in used],
+                                        [[stage] + [c[i] for i in used] for stage, c in counts.items()]))
+        st.download_button("Export metrics (Prometheus)", registry.prometheus_text(),
+                           file_name="salary_app_metrics.prom", mime="text/plain")
@@ -0,0 +1,46 @@
+"""Deferred imports for heavy visualization and ML libraries.
+
+``px = lazy_import("plotly.express")`` returns a stand-in whose first
+attribute access performs the real import, so an app can keep its imports at
+the top of the script while replicas pay for plotly (or pandas, sklearn) only
+when a chart or prediction actually needs it.
+
+The stand-in is deliberately not registered in ``sys.modules``: tools that scan
+every loaded module (``inspect.getmodule``, file watchers) would otherwise
+trigger the import themselves.
+"""
+import importlib
+import importlib.util
+import sys
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None or self._name in sys.modules
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if it is already imported, else a LazyModule for it."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name.split(".")[0]) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
@@ -0,0 +1,192 @@
+import numpy as np
+
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+
+def feature_columns(X, feature_names):
+    """``{column: 1-D array}`` for a DataFrame, a 2-D array or a sequence of row tuples in `feature_names` order."""
+    if hasattr(X, 'columns'):
+        return {col: X[col].to_numpy() for col in feature_names}
+    array = np.asarray(X, dtype=object)
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    return {col: array[:, i] for i, col in enumerate(feature_names)}
+
+
+class LinearKernel:
+    """Pandas-free scorer for a fitted scaler + one-hot + linear pipeline.
+
+    The StandardScaler is folded into the numeric weights and every one-hot
+    category becomes an entry in a per-column lookup table, so a prediction is
+    ``intercept + numeric @ weights + sum(table[column][value])``. Unknown
+    categories contribute 0, matching ``OneHotEncoder(handle_unknown='ignore')``.
+
+    `numeric_means` (the scaler means) only matter for ``explain``: numeric
+    contributions are measured from the mean, as the pipeline's standardized
+    coefficient x transformed value, and the rest goes into ``baseline``.
+    """
+
+    def __init__(self, intercept, numeric_weights, category_tables, feature_names=FEATURE_COLUMNS, numeric_means=None):
+        self.intercept = float(intercept)
+        self.feature_names = list(feature_names)
+        self.numeric_columns = list(numeric_weights)
+        self.numeric_weights = np.array([numeric_weights[col] for col in self.numeric_columns], dtype=float)
+        numeric_means = numeric_means or {}
+        self.numeric_means = np.array([numeric_means.get(col, 0.0) for col in self.numeric_columns], dtype=float)
+        # The pipeline's own intercept: the prediction before any per-feature contribution
+        self.baseline = self.intercept + float(self.numeric_weights @ self.numeric_means)
+        self.categorical_columns = list(category_tables)
+
+        # Sorted vocabularies + weights for vectorized lookups, dicts for single rows
+        self.vocabularies = {}
+        self.category_weights = {}
+        self.category_tables = {}
+        for col, table in category_tables.items():
+            table = {str(value): float(weight) for value, weight in table.items()}
+            vocabulary = np.array(sorted(table), dtype=str)
+            self.vocabularies[col] = vocabulary
+            self.category_weights[col] = np.array([table[value] for value in vocabulary], dtype=float)
+            self.category_tables[col] = table
+
+        position = {col: i for i, col in enumerate(self.feature_names)}
+        self._numeric_positions = [(position[col], float(w)) for col, w in zip(self.numeric_columns, self.numeric_weights)]
+        self._categorical_positions = [(position[col], self.category_tables[col]) for col in self.categorical_columns]
+        self._mean_positions = [(position[col], float(w), float(m)) for col, w, m
+                                in zip(self.numeric_columns, self.numeric_weights, self.numeric_means)]
+
+    def predict_one(self, row):
+        """Score one row given as a tuple in ``feature_names`` order."""
+        total = self.intercept
+        for index, weight in self._numeric_positions:
+            total += weight * float(row[index])
+        for index, table in self._categorical_positions:
+            total += table.get(str(row[index]), 0.0)
+        return total
+
+    def predict(self, X):
+        """Score a DataFrame, a 2-D array or a sequence of row tuples."""
+        columns = self._columns(X)
+        n_rows = len(columns[self.feature_names[0]])
+        result = np.full(n_rows, self.intercept)
+        for col, weight in zip(self.numeric_columns, self.numeric_weights):
+            result += weight * np.asarray(columns[col], dtype=float)
+        for col in self.categorical_columns:
+            result += self._lookup(col, columns[col])
+        return result
+
+    def explain_one(self, row):
+        """Per-feature contributions for one row, as ``{column: amount}``; they sum to the prediction minus ``baseline``."""
+        contributions = [0.0] * len(self.feature_names)
+        for index, weight, mean in self._mean_positions:
+            contributions[index] = weight * (float(row[index]) - mean)
+        for index, table in self._categorical_positions:
+            contributions[index] = table.get(str(row[index]), 0.0)
+        return dict(zip(self.feature_names, contributions))
+
+    def explain(self, X):
+        """Contributions for a batch as an ``(n_rows, n_features)`` array in ``feature_names`` order.
+
+        ``baseline + explain(X).sum(axis=1)`` equals ``predict(X)``.
+        """
+        columns = self._columns(X)
+        out = np.empty((len(columns[self.feature_names[0]]), len(self.feature_names)))
+        for col, weight, mean in zip(self.numeric_columns, self.numeric_weights, self.numeric_means):
+            out[:, self.feature_names.index(col)] = weight * (np.asarray(columns[col], dtype=float) - mean)
+        for col in self.categorical_columns:
+            out[:, self.feature_names.index(col)] = self._lookup(col, columns[col])
+        return out
+
+    def _lookup(self, col, values):
+        vocabulary = self.vocabularies[col]
+        values = np.asarray(values).astype(str)
+        index = np.searchsorted(vocabulary, values)
+        index = np.minimum(index, len(vocabulary) - 1)
+        known = vocabulary[index] == values
+        return np.where(known, self.category_weights[col][index], 0.0)
+
+    def _columns(self, X):
+        return feature_columns(X, self.feature_names)
+
+
+class PipelineScorer:
+    """Adapter giving any fitted sklearn pipeline the same interface as LinearKernel."""
+
+    def __init__(self, pipeline, feature_names=FEATURE_COLUMNS):
+        self.pipeline = pipeline
+        self.feature_names = list(feature_names)
+
+    @property
+    def vocabularies(self):
+        encoder = self.pipeline.named_steps['preprocessor'].named_transformers_['cat']
+        return dict(zip(CATEGORICAL_COLUMNS, encoder.categories_))
+
+    def predict_one(self, row):
+        return float(self.predict([row])[0])
+
+    def predict(self, X):
+        import pandas as pd
+
+        if not hasattr(X, 'columns'):
+            X = pd.DataFrame(list(X), columns=self.feature_names)
+        X = X.astype({col: str for col in CATEGORICAL_COLUMNS if col in X.columns})
+        for col in NUMERIC_COLUMNS:
+            X[col] = pd.to_numeric(X[col])
+        return self.pipeline.predict(X)
+
+
+def compile_pipeline(pipeline):
+    """Compile a fitted ``preprocessor -> LinearRegression`` pipeline into a LinearKernel.
+
+    Raises ValueError if the pipeline uses anything the kernel cannot reproduce.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = pipeline.named_steps.get('preprocessor')
+    regressor = pipeline.steps[-1][1]
+    if not isinstance(preprocessor, ColumnTransformer) or len(pipeline.steps) != 2:
+        raise ValueError("Expected a 'preprocessor' ColumnTransformer followed by a regressor.")
+    coef = getattr(regressor, 'coef_', None)
+    if coef is None or np.ndim(coef) != 1:
+        raise ValueError(f"{type(regressor).__name__} is not a single-output linear model.")
+
+    numeric_weights = {}
+    numeric_means = {}
+    category_tables = {}
+    intercept = float(regressor.intercept_)
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        weights = coef[preprocessor.output_indices_[name]]
+        if isinstance(transformer, StandardScaler):
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+            scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+            folded = weights / scale
+            intercept -= float(np.dot(folded, mean))
+            numeric_weights.update(zip(columns, folded))
+            numeric_means.update(zip(columns, mean))
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop_idx_ is not None or getattr(transformer, '_infrequent_enabled', False):
+                raise ValueError("OneHotEncoder with drop or infrequent categories is not supported.")
+            offset = 0
+            for col, categories in zip(columns, transformer.categories_):
+                category_tables[col] = dict(zip(categories, weights[offset:offset + len(categories)]))
+                offset += len(categories)
+        else:
+            raise ValueError(f"Unsupported transformer '{name}': {transformer!r}")
+
+    feature_names = list(getattr(preprocessor, 'feature_names_in_', FEATURE_COLUMNS))
+    return LinearKernel(intercept, numeric_weights, category_tables, feature_names=feature_names,
+                        numeric_means=numeric_means)
+
+
+def compile_predictor(pipeline):
+    """Return a LinearKernel for linear pipelines, a TreeEnsembleKernel for tree ensembles, else a PipelineScorer."""
+    from tree_kernel import compile_tree_pipeline
+
+    for compile_ in (compile_pipeline, compile_tree_pipeline):
+        try:
+            return compile_(pipeline)
+        except ValueError:
+            pass
+    return PipelineScorer(pipeline)
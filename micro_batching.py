@@ -0,0 +1,111 @@
+"""Thread-based micro-batching of single-row predictions from concurrent sessions.
+
+Streamlit runs every session's script on its own thread, so simultaneous
+predictions arrive as many one-row calls. ``BatchingExecutor.submit`` puts the
+row on a shared queue and returns a ``concurrent.futures.Future``; one worker
+thread takes whatever rows arrive within ``max_wait_ms`` of the first (up to
+``max_batch_size``) and scores them with a single vectorized ``predict``.
+This is the thread counterpart of inference_service.MicroBatcher.
+
+    batcher = BatchingExecutor(kernel.predict, max_batch_size=64, max_wait_ms=1.0)
+    prediction = batcher.submit(row).result()
+
+A row that arrives alone waits at most ``max_wait_ms`` before it is scored.
+Every queued future is resolved, with the prediction or with the error that
+scoring raised, and ``predict_one`` gives up after ``RESULT_TIMEOUT_S``.
+After ``close()`` rows are scored inline on the caller's thread, so sessions
+still holding a replaced model are answered too.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+_STOP = object()
+# Seconds predict_one waits for its row to be scored before raising TimeoutError
+RESULT_TIMEOUT_S = 30.0
+
+
+class BatchingExecutor:
+    def __init__(self, predict, max_batch_size=64, max_wait_ms=1.0):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one row (a tuple in feature order); the future resolves to its prediction as a float."""
+        future = Future()
+        with self._lock:
+            if not self._closed:
+                self._queue.put((row, future))
+                return future
+        future.set_running_or_notify_cancel()
+        self._score([(row, future)])
+        return future
+
+    def predict_one(self, row, timeout=RESULT_TIMEOUT_S):
+        return self.submit(row).result(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            pending = [item]
+            stop = False
+            try:
+                while len(pending) < self.max_batch_size:
+                    item = self._queue.get(timeout=self.max_wait)
+                    if item is _STOP:
+                        stop = True
+                        break
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            # From here on a future can no longer be cancelled; drop those that already were
+            pending = [(row, future) for row, future in pending if future.set_running_or_notify_cancel()]
+            try:
+                if pending:
+                    self._score(pending)
+            except Exception as e:
+                # Keep the worker alive, and never leave a caller waiting on an unresolved future
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+            if stop:
+                return
+
+    def _score(self, pending):
+        rows = [row for row, _ in pending]
+        try:
+            predictions = [float(prediction) for prediction in self.predict(rows)]
+            if len(predictions) != len(rows):
+                raise ValueError(f"predict returned {len(predictions)} predictions for {len(rows)} rows")
+        except Exception as e:
+            if len(pending) == 1:
+                pending[0][1].set_exception(e)
+                return
+            # One bad row must not fail the requests it happened to be batched with
+            for item in pending:
+                self._score([item])
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        for (_, future), prediction in zip(pending, predictions):
+            future.set_result(prediction)
+
+    def close(self):
+        """Score what is already queued, stop the worker and score later rows inline."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
@@ -0,0 +1,198 @@
+"""Versioned, sklearn-free artifact format for the linear salary model.
+
+``best_model.pkl`` needs sklearn (at the pinned version) and arbitrary
+unpickling just to start. For the linear pipeline everything the apps need is a
+handful of arrays, so it is exported as:
+
+    best_model.npz   uncompressed arrays: coef, intercept, scaler_mean,
+                     scaler_scale and one vocabulary_<column> per categorical
+    best_model.json  manifest: format name/version, column layout, array
+                     shapes, checksum of the .npz and a fingerprint of the
+                     source pickle
+
+Loading it only needs NumPy and yields a LinearKernel. The arrays are read,
+not memory-mapped: they hold a few dozen numbers that are folded into the
+kernel's lookup tables at once (and NumPy cannot map members of an .npz).
+
+    python model_artifact.py export --model best_model.pkl
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from linear_kernel import LinearKernel
+from prediction_table import file_fingerprint, fingerprint_matches
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+ARTIFACT_FORMAT = "salary-linear-model"
+FORMAT_VERSION = 1
+
+
+def artifact_paths(model_path):
+    # best_model.pkl -> (best_model.npz, best_model.json)
+    stem = os.path.splitext(model_path)[0]
+    return stem + ".npz", stem + ".json"
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_arrays(pipeline):
+    """Pull coefficients, scaler statistics and vocabularies out of a fitted linear pipeline."""
+    import sklearn
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = pipeline.named_steps['preprocessor']
+    regressor = pipeline.steps[-1][1]
+    scaler = preprocessor.named_transformers_['num']
+    encoder = preprocessor.named_transformers_['cat']
+    if not isinstance(scaler, StandardScaler) or not isinstance(encoder, OneHotEncoder):
+        raise ValueError("Expected StandardScaler and OneHotEncoder transformers.")
+    if np.ndim(getattr(regressor, 'coef_', None)) != 1:
+        raise ValueError(f"{type(regressor).__name__} is not a single-output linear model.")
+    if encoder.drop_idx_ is not None or getattr(encoder, '_infrequent_enabled', False):
+        raise ValueError("OneHotEncoder with drop or infrequent categories is not supported.")
+    if list(preprocessor.transformers_[0][2]) != NUMERIC_COLUMNS or list(preprocessor.transformers_[1][2]) != CATEGORICAL_COLUMNS:
+        raise ValueError("Unexpected column layout in the preprocessor.")
+
+    arrays = {
+        'coef': np.asarray(regressor.coef_, dtype=np.float64),
+        'intercept': np.array([regressor.intercept_], dtype=np.float64),
+        'scaler_mean': np.asarray(scaler.mean_ if scaler.with_mean else np.zeros(len(NUMERIC_COLUMNS)), dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_ if scaler.with_std else np.ones(len(NUMERIC_COLUMNS)), dtype=np.float64),
+    }
+    for col, categories in zip(CATEGORICAL_COLUMNS, encoder.categories_):
+        arrays[f'vocabulary_{col}'] = np.array([str(c) for c in categories])
+    return arrays, {'sklearn_version': sklearn.__version__, 'regressor': type(regressor).__name__}
+
+
+def export_artifact(pipeline, model_path):
+    """Write the .npz + .json artifact for `pipeline`, fingerprinting its source pickle at `model_path`."""
+    arrays, training = extract_arrays(pipeline)
+    npz_path, manifest_path = artifact_paths(model_path)
+
+    # Per-process temp names: the apps may re-export the same changed model at the same time
+    tmp_npz = f"{npz_path}.tmp{os.getpid()}.npz"
+    try:
+        np.savez(tmp_npz, **arrays)
+        npz_sha256 = _sha256(tmp_npz)
+        os.replace(tmp_npz, npz_path)
+    except BaseException:
+        if os.path.exists(tmp_npz):
+            os.remove(tmp_npz)
+        raise
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'format_version': FORMAT_VERSION,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'feature_names': FEATURE_COLUMNS,
+        'numeric_columns': NUMERIC_COLUMNS,
+        'categorical_columns': CATEGORICAL_COLUMNS,
+        'arrays': {name: {'shape': list(a.shape), 'dtype': a.dtype.str} for name, a in arrays.items()},
+        'npz_sha256': npz_sha256,
+        'source': file_fingerprint(model_path),
+        'training': training,
+    }
+    tmp_manifest = f"{manifest_path}.tmp{os.getpid()}"
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path)
+    return manifest
+
+
+def read_manifest(model_path):
+    _, manifest_path = artifact_paths(model_path)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(f"'{manifest_path}' is not a {ARTIFACT_FORMAT} manifest.")
+    if manifest.get('format_version', 0) > FORMAT_VERSION:
+        raise ValueError(f"Artifact format version {manifest['format_version']} is newer than supported ({FORMAT_VERSION}).")
+    return manifest
+
+
+def load_artifact(model_path, verify=True):
+    """Load the artifact next to `model_path` as a LinearKernel, without importing sklearn."""
+    manifest = read_manifest(model_path)
+    npz_path, _ = artifact_paths(model_path)
+    if verify and _sha256(npz_path) != manifest['npz_sha256']:
+        raise ValueError(f"Checksum mismatch for '{npz_path}'.")
+
+    with np.load(npz_path) as data:
+        coef = data['coef']
+        intercept = float(data['intercept'][0])
+        mean, scale = data['scaler_mean'], data['scaler_scale']
+        vocabularies = {col: data[f'vocabulary_{col}'].tolist() for col in manifest['categorical_columns']}
+
+    # Fold the scaler into the numeric weights, as linear_kernel.compile_pipeline does
+    numeric_columns = manifest['numeric_columns']
+    folded = coef[:len(numeric_columns)] / scale
+    intercept -= float(folded @ mean)
+    category_tables = {}
+    offset = len(numeric_columns)
+    for col, vocabulary in vocabularies.items():
+        category_tables[col] = dict(zip(vocabulary, coef[offset:offset + len(vocabulary)]))
+        offset += len(vocabulary)
+    return LinearKernel(intercept, dict(zip(numeric_columns, folded)), category_tables,
+                        feature_names=manifest['feature_names'], numeric_means=dict(zip(numeric_columns, mean)))
+
+
+def artifact_is_fresh(model_path):
+    """True if the artifact exists and was exported from the current contents of `model_path`."""
+    npz_path, _ = artifact_paths(model_path)
+    try:
+        manifest = read_manifest(model_path)
+    except (OSError, ValueError):
+        return False
+    return os.path.exists(npz_path) and fingerprint_matches(manifest.get('source'), model_path)
+
+
+def load_model(model_path):
+    """Return ``(scorer, pipeline)`` for `model_path`, preferring the fast artifact.
+
+    When the artifact is missing or stale the pickle is loaded instead and, for
+    linear pipelines, a fresh artifact is exported for the next start. The
+    pipeline is None when the artifact was used.
+    """
+    if artifact_is_fresh(model_path):
+        try:
+            return load_artifact(model_path), None
+        except (OSError, ValueError, KeyError):
+            pass
+
+    import joblib
+
+    from linear_kernel import compile_predictor
+
+    pipeline = joblib.load(model_path)
+    scorer = compile_predictor(pipeline)
+    if isinstance(scorer, LinearKernel):
+        try:
+            export_artifact(pipeline, model_path)
+        except (OSError, ValueError):
+            pass  # read-only deployments keep working from the pickle
+    return scorer, pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export best_model.pkl to the sklearn-free artifact format.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export')
+    export.add_argument('--model', default="best_model.pkl")
+    args = parser.parse_args()
+
+    import joblib
+
+    manifest = export_artifact(joblib.load(args.model), args.model)
+    npz_path, manifest_path = artifact_paths(args.model)
+    print(f"Wrote '{npz_path}' and '{manifest_path}' (format {manifest['format']} v{manifest['format_version']}).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Local, file-based model registry: immutable versions behind an atomic pointer.
+
+    model_registry/
+        versions/<version>/best_model.pkl   the registered model
+                          /best_model.*     its intervals, artifact and prediction table
+                          /metadata.json    sha256, registration time, note and metrics
+        CURRENT                             version served by the apps
+        SHADOW                              optional candidate scored alongside it
+        HISTORY                             promotions and rollbacks, one JSON line each
+        shadow/                             shadow-scoring reports from running apps
+
+A version is copied into a temporary directory, where its artifact and
+prediction table are built too, and renamed into place; nothing in a version
+directory changes afterwards. The pointers are rewritten with ``os.replace``,
+so a reader sees either the old or the new state, never a partly written model. Running apps notice a new
+pointer within a second and load that version in the background while
+the previous one keeps serving (predictor.py).
+
+    python model_registry.py register best_model.pkl --note "weekly retrain"
+    python model_registry.py shadow <version>     # score it on live traffic first
+    python model_registry.py promote <version>
+    python model_registry.py rollback
+    python model_registry.py list
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import time
+
+from prediction_intervals import intervals_path, load_intervals
+from prediction_table import file_fingerprint
+
+MODEL_FILENAME = "best_model.pkl"
+CURRENT = "CURRENT"
+SHADOW = "SHADOW"
+HISTORY = "HISTORY"
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.reports_dir = os.path.join(root, "shadow")
+        self._pointers = {}  # pointer name -> ((size, mtime_ns), version)
+
+    # --- versions ---
+
+    def register(self, model_path, note=None, metrics=None):
+        """Copy `model_path` (and its calibrated intervals) in as a new version; return its id.
+
+        Registering a file whose contents are already registered returns the existing version.
+        """
+        fingerprint = file_fingerprint(model_path)
+        for version in self.versions():
+            if self.metadata(version)['sha256'] == fingerprint['sha256']:
+                return version
+
+        version = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + fingerprint['sha256'][:12]
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.versions_dir, f".{version}.tmp{os.getpid()}")
+        os.makedirs(staging)
+        try:
+            # copy2 keeps the mtime, so the intervals' fingerprint still matches the copy
+            shutil.copy2(model_path, os.path.join(staging, MODEL_FILENAME))
+            has_intervals = load_intervals(model_path) is not None
+            if has_intervals:
+                shutil.copy2(intervals_path(model_path),
+                             intervals_path(os.path.join(staging, MODEL_FILENAME)))
+            _build_derived_files(os.path.join(staging, MODEL_FILENAME))
+            metadata = {
+                'version': version, 'sha256': fingerprint['sha256'], 'size': fingerprint['size'],
+                'registered_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                'source': os.path.abspath(model_path), 'intervals': has_intervals,
+                'note': note, 'metrics': metrics or {},
+            }
+            with open(os.path.join(staging, "metadata.json"), "w") as f:
+                json.dump(metadata, f, indent=2)
+            os.rename(staging, os.path.join(self.versions_dir, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def versions(self):
+        """Registered version ids, oldest first."""
+        try:
+            names = os.listdir(self.versions_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name for name in names if not name.startswith("."))
+
+    def metadata(self, version):
+        with open(os.path.join(self.versions_dir, version, "metadata.json")) as f:
+            return json.load(f)
+
+    def model_path(self, version):
+        return os.path.join(self.versions_dir, version, MODEL_FILENAME)
+
+    # --- pointers ---
+
+    def current(self):
+        """The promoted version id, or None if nothing has been promoted."""
+        return self._read_pointer(CURRENT)
+
+    def shadow(self):
+        """The candidate version scored in shadow mode, or None."""
+        return self._read_pointer(SHADOW)
+
+    def promote(self, version):
+        """Point CURRENT at `version`; running apps swap to it in the background."""
+        self._set_current(version, {})
+
+    def rollback(self):
+        """Promote the version that was current before the present one; return it.
+
+        Each rollback steps one promotion further back, so repeated rollbacks walk the history.
+        """
+        stack = self._promotion_stack()
+        current = self.current()
+        while stack and stack[-1] == current:
+            stack.pop()
+        for version in reversed(stack):
+            if os.path.isdir(os.path.join(self.versions_dir, version)):
+                self._set_current(version, {'rollback': True})
+                return version
+        raise ValueError("No earlier promoted version to roll back to.")
+
+    def history(self):
+        """Promoted version ids (rollbacks included), oldest first."""
+        return [entry['version'] for entry in self._history_entries()]
+
+    def _set_current(self, version, record):
+        self._check_exists(version)
+        self._write_pointer(CURRENT, version)
+        with open(os.path.join(self.root, HISTORY), "a") as f:
+            f.write(json.dumps({'version': version, 'promoted_at': time.time(), **record}) + "\n")
+        if self.shadow() == version:
+            self.set_shadow(None)
+
+    def _history_entries(self):
+        try:
+            with open(os.path.join(self.root, HISTORY)) as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _promotion_stack(self):
+        # Promotions push a version; a rollback to a version pops everything promoted after it
+        stack = []
+        for entry in self._history_entries():
+            if entry.get('rollback'):
+                while stack and stack[-1] != entry['version']:
+                    stack.pop()
+                if not stack:
+                    stack.append(entry['version'])
+            else:
+                stack.append(entry['version'])
+        return stack
+
+    def set_shadow(self, version):
+        """Score `version` alongside production on live traffic; None stops shadow scoring."""
+        if version is not None:
+            self._check_exists(version)
+        self._write_pointer(SHADOW, version)
+
+    def _check_exists(self, version):
+        if not os.path.exists(self.model_path(version)):
+            raise ValueError(f"Version '{version}' is not registered in '{self.root}'.")
+
+    def _write_pointer(self, name, version):
+        path = os.path.join(self.root, name)
+        if version is None:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, path)
+
+    def _read_pointer(self, name):
+        # Polled by running apps (predictor.py): a stat, and a read only when the pointer file changed
+        path = os.path.join(self.root, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        cached = self._pointers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        try:
+            with open(path) as f:
+                version = f.read().strip() or None
+        except FileNotFoundError:
+            return None
+        self._pointers[name] = (key, version)
+        return version
+
+    # --- shadow reports ---
+
+    def shadow_reports(self, candidate=None):
+        """Shadow-scoring summaries written by running processes, optionally for one candidate."""
+        reports = []
+        for path in sorted(glob.glob(os.path.join(self.reports_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if candidate is None or report.get('candidate') == candidate:
+                reports.append(report)
+        return reports
+
+
+def _build_derived_files(model_path):
+    """Write what the apps derive from `model_path` (sklearn-free artifact, prediction table) next to it."""
+    from model_artifact import load_model
+    from prediction_table import load_prediction_table
+
+    kernel, _ = load_model(model_path)
+    load_prediction_table(model_path, predictor=kernel)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry.")
+    parser.add_argument('--root', default=None, help="Registry directory (default: SALARY_APP_MODEL_REGISTRY).")
+    commands = parser.add_subparsers(dest='command', required=True)
+    register = commands.add_parser('register', help="Add a model file as a new version.")
+    register.add_argument('model', nargs='?', default=MODEL_FILENAME)
+    register.add_argument('--note')
+    register.add_argument('--promote', action='store_true', help="Serve it right away.")
+    promote = commands.add_parser('promote', help="Serve a registered version.")
+    promote.add_argument('version')
+    commands.add_parser('rollback', help="Serve the previously promoted version again.")
+    shadow = commands.add_parser('shadow', help="Score a candidate version on live traffic.")
+    shadow.add_argument('version', nargs='?')
+    shadow.add_argument('--clear', action='store_true')
+    commands.add_parser('list', help="List versions and shadow-scoring results.")
+    args = parser.parse_args()
+
+    from app_settings import MODEL_REGISTRY_DIR
+
+    registry = ModelRegistry(args.root or MODEL_REGISTRY_DIR or "model_registry")
+    if args.command == 'register':
+        version = registry.register(args.model, note=args.note)
+        print(f"Registered '{args.model}' as {version}.")
+        if args.promote:
+            registry.promote(version)
+            print(f"Promoted {version}.")
+    elif args.command == 'promote':
+        registry.promote(args.version)
+        print(f"Promoted {args.version}; running apps switch to it within a second.")
+    elif args.command == 'rollback':
+        print(f"Rolled back to {registry.rollback()}.")
+    elif args.command == 'shadow':
+        if args.clear == bool(args.version):
+            parser.error("shadow takes either a version or --clear.")
+        registry.set_shadow(None if args.clear else args.version)
+        print("Shadow scoring stopped." if args.clear else f"Shadow scoring {args.version}.")
+    else:
+        current, candidate = registry.current(), registry.shadow()
+        for version in registry.versions():
+            metadata = registry.metadata(version)
+            marker = "current" if version == current else "shadow" if version == candidate else ""
+            print(f"{version}  {marker:<7}  {metadata['registered_at']}  {metadata.get('note') or ''}")
+        for report in registry.shadow_reports(candidate):
+            delta, latency = report['delta'], report['latency_ms']
+            print(f"shadow {report['candidate']} vs {report['production']} (pid {report['pid']}): "
+                  f"{report['rows']:,} rows, mean |delta| {delta.get('mean_abs', 0):,.2f}, "
+                  f"max |delta| {delta.get('max_abs', 0):,.2f}, p95 latency "
+                  f"{latency['production'].get('p95_ms', 0):.3f} -> {latency['candidate'].get('p95_ms', 0):.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Process-wide LRU cache of single-row predictions.
+
+Keys are the normalized input tuple ``(Education, Experience, Location,
+Job_Title, Age, Gender)``: categoricals as str and numerics as float, so
+``5`` and ``5.0`` share an entry while every key still maps to exactly one
+model output. Each loaded model version owns its own cache, so replacing the
+model file invalidates every cached prediction.
+"""
+import threading
+from collections import OrderedDict
+
+from schema import FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+_NUMERIC_POSITIONS = frozenset(FEATURE_COLUMNS.index(col) for col in NUMERIC_COLUMNS)
+
+
+def normalize_row(row):
+    return tuple(float(value) if i in _NUMERIC_POSITIONS else str(value) for i, value in enumerate(row))
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, row, compute):
+        """Return the cached prediction for `row`, calling ``compute(row)`` on a miss."""
+        if self.maxsize <= 0:
+            return compute(row)
+        key = normalize_row(row)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = compute(row)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries), 'maxsize': self.maxsize,
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def render_cache_panel(cache):
+    """Sidebar panel with the hit/miss/eviction counters, for sizing the cache."""
+    import streamlit as st
+
+    stats = cache.stats()
+    with st.sidebar.expander("🗄️ Prediction Cache"):
+        cols = st.columns(2)
+        cols[0].metric("Hit rate", f"{stats['hit_rate']:.1%}")
+        cols[1].metric("Entries", f"{stats['size']:,} / {stats['maxsize']:,}")
+        st.caption(f"Hits {stats['hits']:,} · Misses {stats['misses']:,} · Evictions {stats['evictions']:,} "
+                   "(since the current model was loaded, across all sessions)")
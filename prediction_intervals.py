@@ -0,0 +1,156 @@
+"""Calibrated prediction intervals, computed at training time and served by lookup.
+
+Intervals are split-conformal: the residuals ``y - prediction`` of rows the
+model was not fit on give, per segment (Education by default), the offsets
+below and above a prediction that cover the target with the requested
+probability. Segments with too few calibration rows use the global offsets.
+Models refit from running statistics (incremental_update.py, ``train.py
+--streaming``) get an analytic OLS interval from the residual variance instead.
+
+The offsets are stored next to the model as ``<stem>.intervals.json`` with a
+fingerprint of the model file, so serving an interval is a dict lookup plus an
+addition and a stale file is never applied to a new model.
+
+    python prediction_intervals.py --model best_model.pkl --data salary_prediction_data.csv
+"""
+import argparse
+import json
+import math
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+from prediction_table import file_fingerprint, fingerprint_matches
+from schema import FEATURE_COLUMNS
+
+COVERAGE = 0.9
+SEGMENT_COLUMN = 'Education'
+MIN_SEGMENT_SIZE = 30
+
+
+def intervals_path(model_path):
+    # best_model.pkl -> best_model.intervals.json
+    return os.path.splitext(model_path)[0] + ".intervals.json"
+
+
+def conformal_offsets(residuals, coverage=COVERAGE):
+    """(low, high) offsets with the finite-sample split-conformal correction on each tail."""
+    residuals = np.sort(np.asarray(residuals, dtype=np.float64))
+    n = len(residuals)
+    tail = (1 - coverage) / 2
+    k = min(n, math.ceil((n + 1) * (1 - tail)))  # rank of the upper order statistic
+    return float(residuals[n - k]), float(residuals[k - 1])
+
+
+def calibrate(residuals, segments=None, coverage=COVERAGE, segment_column=SEGMENT_COLUMN,
+              min_segment_size=MIN_SEGMENT_SIZE):
+    """Interval spec from held-out residuals, with per-segment offsets where there are enough rows."""
+    residuals = np.asarray(residuals, dtype=np.float64)
+    spec = {
+        'method': 'split_conformal', 'coverage': coverage, 'n_calibration': len(residuals),
+        'global': list(conformal_offsets(residuals, coverage)),
+        'segment_column': segment_column, 'segments': {},
+    }
+    if segments is not None:
+        segments = np.asarray(segments).astype(str)
+        for value in np.unique(segments):
+            mask = segments == value
+            if mask.sum() >= min_segment_size:
+                spec['segments'][str(value)] = list(conformal_offsets(residuals[mask], coverage))
+    return spec
+
+
+def analytic_spec(residual_std, n, coverage=COVERAGE):
+    """Symmetric OLS interval ``± z * sigma``, for models fit from running statistics."""
+    z = NormalDist().inv_cdf(0.5 + coverage / 2)
+    return {'method': 'ols_normal', 'coverage': coverage, 'n_calibration': n,
+            'global': [-z * residual_std, z * residual_std], 'segment_column': None, 'segments': {}}
+
+
+class PredictionIntervals:
+    def __init__(self, spec):
+        self.spec = spec
+        self.coverage = spec['coverage']
+        self.default = tuple(spec['global'])
+        self.segment_column = spec.get('segment_column')
+        self.offsets = {value: tuple(bounds) for value, bounds in spec.get('segments', {}).items()}
+        self._position = FEATURE_COLUMNS.index(self.segment_column) if self.segment_column else None
+
+    def interval_one(self, row, prediction):
+        """(low, high) for one row in FEATURE_COLUMNS order and its point prediction."""
+        low, high = self.default
+        if self._position is not None:
+            low, high = self.offsets.get(str(row[self._position]), self.default)
+        return prediction + low, prediction + high
+
+    def interval(self, X, predictions):
+        """Vectorized (low, high) arrays for a DataFrame or 2-D array in FEATURE_COLUMNS order."""
+        predictions = np.asarray(predictions, dtype=np.float64)
+        low = np.full(len(predictions), self.default[0])
+        high = np.full(len(predictions), self.default[1])
+        if self._position is not None and self.offsets:
+            column = X[self.segment_column] if hasattr(X, 'columns') else np.asarray(X, dtype=object)[:, self._position]
+            values, inverse = np.unique(np.asarray(column).astype(str), return_inverse=True)
+            bounds = np.array([self.offsets.get(value, self.default) for value in values])
+            low, high = bounds[inverse, 0], bounds[inverse, 1]
+        return predictions + low, predictions + high
+
+
+def save_intervals(spec, model_path, source_path=None):
+    """Write `spec` next to `model_path`, fingerprinting the model it was calibrated for.
+
+    Pass the temporary file as `source_path` when the model is about to be
+    replaced atomically, so the intervals are in place before the new model is.
+    """
+    path = intervals_path(model_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**spec, 'model': file_fingerprint(source_path or model_path)}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_intervals(model_path):
+    """The intervals calibrated for the current `model_path`, or None if missing or stale."""
+    try:
+        with open(intervals_path(model_path)) as f:
+            spec = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not fingerprint_matches(spec.get('model'), model_path):
+        return None
+    return PredictionIntervals(spec)
+
+
+def cross_conformal(pipeline, data_path, cv=5, coverage=COVERAGE, random_state=42):
+    """Calibrate an already-fitted pipeline from out-of-fold residuals of refits on `data_path`."""
+    from sklearn.base import clone
+    from sklearn.model_selection import KFold, cross_val_predict
+
+    from train import load_training_data
+
+    x, y = load_training_data(data_path)
+    folds = KFold(n_splits=cv, shuffle=True, random_state=random_state)
+    predictions = cross_val_predict(clone(pipeline), x, y, cv=folds)
+    return calibrate(y.to_numpy() - predictions, x[SEGMENT_COLUMN], coverage)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate prediction intervals for an existing model.")
+    parser.add_argument('--model', default="best_model.pkl")
+    parser.add_argument('--data', default="salary_prediction_data.csv")
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--coverage', type=float, default=COVERAGE)
+    args = parser.parse_args()
+
+    import joblib
+
+    spec = cross_conformal(joblib.load(args.model), args.data, cv=args.cv, coverage=args.coverage)
+    save_intervals(spec, args.model)
+    low, high = spec['global']
+    print(f"Wrote '{intervals_path(args.model)}': {spec['coverage']:.0%} interval {low:+,.0f} / {high:+,.0f} "
+          f"({len(spec['segments'])} {spec['segment_column']} segments, {spec['n_calibration']:,} residuals)")
+
+
+if __name__ == '__main__':
+    main()
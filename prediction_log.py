@@ -0,0 +1,269 @@
+"""Append-only audit log of predictions, for drift and fairness reviews.
+
+The request path only appends a tuple to an in-memory ring buffer (a bounded
+deque, so no lock and no I/O). A background thread drains it every
+``flush_interval`` seconds and writes the records as a row group to a Parquet
+file, one file per process at a time, rotated after ``rows_per_file`` rows or
+``max_file_age`` seconds. Files are written as ``*.parquet.inprogress`` and
+renamed when closed, so readers only ever see complete files.
+
+If the flusher falls behind by more than ``capacity`` records the oldest are
+dropped and counted in ``dropped``; logging never blocks a prediction. Batches
+of ``SYNC_BATCH_ROWS`` or more (bulk scoring) skip the buffer and are written
+by the caller as one row group, so they are never dropped.
+
+    from prediction_log import read_predictions
+    df = read_predictions("prediction_logs", since="2026-10-01")
+"""
+import atexit
+import concurrent.futures.thread  # noqa: F401  (pyarrow needs it; it cannot be first imported at exit)
+import glob
+import math
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from schema import FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+LOG_COLUMNS = ['timestamp', 'source'] + FEATURE_COLUMNS + ['prediction', 'model_version', 'latency_us']
+FILE_SUFFIX = ".parquet"
+IN_PROGRESS_SUFFIX = ".inprogress"
+# Batches at least this large are written on the caller's thread instead of being buffered
+SYNC_BATCH_ROWS = 1_000
+
+
+def _schema():
+    import pyarrow as pa
+
+    fields = [pa.field('timestamp', pa.timestamp('us', tz='UTC')), pa.field('source', pa.string())]
+    fields += [pa.field(col, pa.float64() if col in NUMERIC_COLUMNS else pa.string()) for col in FEATURE_COLUMNS]
+    fields += [pa.field('prediction', pa.float64()), pa.field('model_version', pa.string()),
+               pa.field('latency_us', pa.float64())]
+    return pa.schema(fields)
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _as_str(value):
+    return None if value is None else str(value)
+
+
+def _array(values, type_, convert):
+    """`values` as a pyarrow array, converted value by value only if the vectorized path rejects them."""
+    import pyarrow as pa
+
+    try:
+        return pa.array(values, type_, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([convert(v) for v in values], type_)
+
+
+class PredictionLogger:
+    def __init__(self, directory, capacity=65_536, flush_interval=1.0, rows_per_file=100_000, max_file_age=600.0):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.rows_per_file = rows_per_file
+        self.max_file_age = max_file_age
+        self.dropped = 0
+        self.written = 0
+        self.errors = 0
+        self._buffer = deque(maxlen=capacity)
+        self._writer = None
+        self._writer_path = None
+        self._writer_rows = 0
+        self._writer_opened = 0.0
+        self._sequence = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- request path ---
+
+    def log(self, source, row, prediction, latency_s, model_version):
+        """Record one prediction; `row` is in FEATURE_COLUMNS order. Costs a tuple and a deque append."""
+        if len(self._buffer) >= self.capacity:
+            self.dropped += 1
+        self._buffer.append((time.time(), source, *row, prediction, model_version, latency_s))
+
+    def log_batch(self, source, rows, predictions, latency_s, model_version):
+        """Record a batch scored together; each row is logged with the batch latency.
+
+        `rows` are tuples in FEATURE_COLUMNS order, or a DataFrame with those columns.
+        """
+        now = time.time()
+        if len(predictions) >= SYNC_BATCH_ROWS:
+            self._write_batch(now, source, rows, predictions, latency_s, model_version)
+            return
+        if hasattr(rows, 'columns'):
+            rows = rows[FEATURE_COLUMNS].itertuples(index=False, name=None)
+        overflow = len(self._buffer) + len(predictions) - self.capacity
+        if overflow > 0:
+            self.dropped += overflow
+        self._buffer.extend((now, source, *row, float(prediction), model_version, latency_s)
+                            for row, prediction in zip(rows, predictions))
+
+    def _write_batch(self, now, source, rows, predictions, latency_s, model_version):
+        n = len(predictions)
+        if hasattr(rows, 'columns'):
+            features = [rows[col].to_numpy() for col in FEATURE_COLUMNS]
+        else:
+            features = list(zip(*rows))
+        columns = [[now] * n, [source] * n, *features, np.asarray(predictions, dtype=float),
+                   [model_version] * n, [latency_s] * n]
+        try:
+            with self._flush_lock:
+                self._write_columns(columns)
+        except Exception:
+            # As in the flusher: a full disk loses these records but never fails the scoring
+            self.errors += 1
+
+    # --- background flushing ---
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Never let a bad batch or a full disk stop the flusher; the records are lost
+                self.errors += 1
+
+    def flush(self):
+        """Write everything buffered so far; called by the flusher thread and on close."""
+        with self._flush_lock:
+            records = []
+            while self._buffer:
+                try:
+                    records.append(self._buffer.popleft())
+                except IndexError:
+                    break
+            if records:
+                self._write(records)
+            if self._writer is not None and time.time() - self._writer_opened > self.max_file_age:
+                self._close_file()
+
+    def _write(self, records):
+        self._write_columns(list(zip(*records)))
+
+    def _write_columns(self, columns):
+        """Append one row group; `columns` holds one sequence per LOG_COLUMNS entry."""
+        import pyarrow as pa
+
+        data = {}
+        for name, values in zip(LOG_COLUMNS, columns):
+            if name == 'timestamp':
+                micros = (np.asarray(values, dtype=float) * 1e6).astype(np.int64)
+                data[name] = pa.array(micros, pa.int64()).cast(pa.timestamp('us', tz='UTC'))
+            elif name == 'latency_us':
+                data[name] = pa.array(np.asarray(values, dtype=float) * 1e6, pa.float64())
+            elif name in NUMERIC_COLUMNS or name == 'prediction':
+                data[name] = _array(values, pa.float64(), _as_float)
+            else:
+                data[name] = _array(values, pa.string(), _as_str)
+        table = pa.Table.from_pydict(data, schema=_schema())
+
+        offset = 0
+        while offset < table.num_rows:
+            if self._writer is None:
+                self._open_file()
+            take = min(table.num_rows - offset, self.rows_per_file - self._writer_rows)
+            self._writer.write_table(table.slice(offset, take))
+            self._writer_rows += take
+            self.written += take
+            offset += take
+            if self._writer_rows >= self.rows_per_file:
+                self._close_file()
+
+    def _open_file(self):
+        import pyarrow.parquet as pq
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._sequence += 1
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        name = f"predictions-{stamp}-{os.getpid()}-{self._sequence:04d}{FILE_SUFFIX}"
+        self._writer_path = os.path.join(self.directory, name)
+        self._writer = pq.ParquetWriter(self._writer_path + IN_PROGRESS_SUFFIX, _schema())
+        self._writer_rows = 0
+        self._writer_opened = time.time()
+
+    def _close_file(self):
+        self._writer.close()
+        os.replace(self._writer_path + IN_PROGRESS_SUFFIX, self._writer_path)
+        self._writer = None
+
+    def close(self):
+        """Stop the flusher, write what is left and finalize the current file."""
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+        self.flush()
+        with self._flush_lock:
+            if self._writer is not None:
+                self._close_file()
+
+
+_lock = threading.Lock()
+_loggers = {}  # directory -> PredictionLogger
+
+
+def get_prediction_logger(directory):
+    """The process-wide logger writing to `directory`, started on first use; None if `directory` is empty."""
+    if not directory:
+        return None
+    logger = _loggers.get(directory)
+    if logger is None:
+        with _lock:
+            logger = _loggers.get(directory)
+            if logger is None:
+                logger = _loggers[directory] = PredictionLogger(directory)
+    return logger
+
+
+# --- offline analysis ---
+
+def prediction_files(directory):
+    """Completed log files in `directory`, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, f"predictions-*{FILE_SUFFIX}")))
+
+
+def read_predictions(directory, since=None, until=None, columns=None):
+    """Load logged predictions as a DataFrame, optionally limited to ``since <= timestamp < until``.
+
+    `since`/`until` accept anything ``pandas.Timestamp`` does (naive values are UTC).
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    files = prediction_files(directory)
+    columns = columns or LOG_COLUMNS
+    if not files:
+        return _schema().empty_table().to_pandas()[columns]
+    filtered = since is not None or until is not None
+    read_columns = columns if not filtered or 'timestamp' in columns else ['timestamp'] + list(columns)
+    frame = pa.concat_tables([pq.read_table(path, columns=read_columns) for path in files]).to_pandas()
+    if filtered:
+        mask = pd.Series(True, index=frame.index)
+        if since is not None:
+            mask &= frame['timestamp'] >= _utc(since)
+        if until is not None:
+            mask &= frame['timestamp'] < _utc(until)
+        frame = frame[mask].reset_index(drop=True)
+    return frame[columns]
+
+
+def _utc(value):
+    import pandas as pd
+
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp.tz_convert('UTC')
@@ -0,0 +1,179 @@
+"""Precomputed prediction table over the finite input space of the apps.
+
+Every combination the selectboxes, sliders and number inputs can produce is
+scored once and stored as a dense ``.npy`` array indexed by category codes.
+Interactive predictions then become a memory-mapped lookup that needs neither
+the model nor sklearn. The table records a fingerprint of the model file and is
+rebuilt automatically when ``best_model.pkl`` changes.
+
+Build it offline with:  python prediction_table.py
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from schema import FEATURE_COLUMNS
+
+
+# Values each app input can take, in FEATURE_COLUMNS order
+GRID_AXES = {
+    'Education': ('High School', 'Bachelor', 'Master', 'PhD'),
+    'Experience': tuple(range(0, 61)),
+    'Location': ('Urban', 'Suburban', 'Rural'),
+    'Job_Title': (
+        'Analyst', 'Director', 'Engineer', 'Manager',  # training vocabulary
+        'Software Engineer', 'Data Scientist', 'Other',  # app1.py
+        'Product Manager', 'Marketing Specialist', 'Financial Analyst',  # app2.py
+    ),
+    'Age': tuple(range(18, 101)),
+    'Gender': ('Male', 'Female', 'Other'),
+}
+
+
+def default_table_path(model_path):
+    # best_model.pkl -> best_model.table.npy, so each model file gets its own table
+    return os.path.splitext(model_path)[0] + ".table.npy"
+
+
+def manifest_path(table_path):
+    return os.path.splitext(table_path)[0] + ".json"
+
+
+def file_fingerprint(path, sha256=None):
+    stat = os.stat(path)
+    if sha256 is None:
+        with open(path, "rb") as f:
+            sha256 = hashlib.sha256(f.read()).hexdigest()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+
+
+def fingerprint_matches(fingerprint, model_path):
+    if not fingerprint:
+        return False
+    stat = os.stat(model_path)
+    if (stat.st_size, stat.st_mtime_ns) == (fingerprint.get('size'), fingerprint.get('mtime_ns')):
+        return True
+    # Touched but possibly unchanged: fall back to comparing contents
+    return file_fingerprint(model_path)['sha256'] == fingerprint.get('sha256')
+
+
+class PredictionTable:
+    """O(1) lookups into a memory-mapped array of precomputed predictions."""
+
+    def __init__(self, values, axes):
+        self.values = values
+        self.axes = {col: tuple(axis) for col, axis in axes.items()}
+        self._codes = []
+        for col in FEATURE_COLUMNS:
+            axis = self.axes[col]
+            if all(isinstance(v, int) for v in axis) and list(axis) == list(range(axis[0], axis[0] + len(axis))):
+                # Contiguous integer axis: the code is an offset from the first value
+                self._codes.append((axis[0], len(axis)))
+            else:
+                self._codes.append({str(value): i for i, value in enumerate(axis)})
+
+    @classmethod
+    def open(cls, table_path):
+        with open(manifest_path(table_path)) as f:
+            manifest = json.load(f)
+        return cls(np.load(table_path, mmap_mode='r'), manifest['axes'])
+
+    def lookup(self, row):
+        """Return the prediction for a row in FEATURE_COLUMNS order, or None if it is off the grid."""
+        index = []
+        for value, codes in zip(row, self._codes):
+            if isinstance(codes, dict):
+                code = codes.get(str(value))
+                if code is None:
+                    return None
+            else:
+                start, size = codes
+                number = float(value)
+                if not number.is_integer() or not 0 <= number - start < size:
+                    return None
+                code = int(number) - start
+            index.append(code)
+        return float(self.values[tuple(index)])
+
+
+def build_table(predictor, model_path, table_path=None, axes=GRID_AXES):
+    """Score the cartesian grid of `axes` with `predictor` and write the table + manifest."""
+    table_path = table_path or default_table_path(model_path)
+    shape = tuple(len(axes[col]) for col in FEATURE_COLUMNS)
+    # Per-process temp names: apps and replicas that notice a new model at the same time
+    # each build their own copy instead of truncating one shared memmap
+    tmp_table = f"{table_path}.tmp{os.getpid()}.npy"
+    try:
+        values = np.lib.format.open_memmap(tmp_table, mode='w+', dtype=np.float64, shape=shape)
+
+        # Score one Education slice at a time to keep the batch size bounded
+        rest = [np.array(axes[col], dtype=object) for col in FEATURE_COLUMNS[1:]]
+        grid = np.meshgrid(*rest, indexing='ij')
+        batch = np.empty((grid[0].size, len(FEATURE_COLUMNS)), dtype=object)
+        for i, column in enumerate(grid, start=1):
+            batch[:, i] = column.ravel()
+        for i, education in enumerate(axes['Education']):
+            batch[:, 0] = education
+            values[i] = np.asarray(predictor.predict(batch), dtype=np.float64).reshape(shape[1:])
+        values.flush()
+        del values
+        os.replace(tmp_table, table_path)
+    except BaseException:
+        if os.path.exists(tmp_table):
+            os.remove(tmp_table)
+        raise
+
+    manifest = {
+        'columns': FEATURE_COLUMNS,
+        'axes': {col: list(axes[col]) for col in FEATURE_COLUMNS},
+        'model': file_fingerprint(model_path),
+    }
+    tmp_manifest = f"{manifest_path(table_path)}.tmp{os.getpid()}"
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, manifest_path(table_path))
+
+
+def is_fresh(model_path, table_path=None):
+    table_path = table_path or default_table_path(model_path)
+    try:
+        with open(manifest_path(table_path)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return os.path.exists(table_path) and fingerprint_matches(manifest.get('model'), model_path)
+
+
+def load_prediction_table(model_path, table_path=None, predictor=None):
+    """Open the table for `model_path`, rebuilding it first if the model has changed.
+
+    `predictor` is used for a rebuild when given; otherwise the model is loaded
+    and compiled on demand, so a fresh table never imports sklearn.
+    """
+    table_path = table_path or default_table_path(model_path)
+    if not is_fresh(model_path, table_path):
+        if predictor is None:
+            import joblib
+
+            from linear_kernel import compile_predictor
+            predictor = compile_predictor(joblib.load(model_path))
+        build_table(predictor, model_path, table_path)
+    return PredictionTable.open(table_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the prediction table for best_model.pkl.")
+    parser.add_argument('--model', default="best_model.pkl")
+    parser.add_argument('--output', default=None, help="Defaults to <model>.table.npy")
+    args = parser.parse_args()
+
+    output = args.output or default_table_path(args.model)
+    table = load_prediction_table(args.model, output)
+    print(f"{output}: shape {table.values.shape}, {table.values.nbytes / 1e6:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
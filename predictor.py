@@ -0,0 +1,223 @@
+"""Process-wide model loading shared by app.py, app1.py and app2.py.
+
+Streamlit re-executes the app script on every interaction, but imported
+modules live for the whole process. Keeping the loaded model here means it is
+unpickled once per process and shared by every session and rerun. At most once
+per ``FRESHNESS_CHECK_S``, ``get_predictor`` stats the model file (and the model
+registry's pointers) and, when the model changed, loads the new one on a background thread while the
+loaded one keeps answering requests, so updates need neither a restart nor a
+pause. Only the very first request of a process waits for a load.
+
+When the model registry (model_registry.py) has a promoted version, it is served
+in place of ``best_model.pkl``, and a version marked as shadow is scored on the
+same traffic by a ShadowScorer (shadow_scoring.py).
+"""
+import os
+import threading
+import time
+
+from app_settings import MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS, MODEL_REGISTRY_DIR, PREDICTION_CACHE_SIZE, \
+    PREDICTION_LOG_DIR
+from input_schema import InputSchema
+from linear_kernel import LinearKernel
+from micro_batching import BatchingExecutor
+from model_artifact import load_model
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+from prediction_intervals import load_intervals
+from prediction_log import get_prediction_logger
+from prediction_table import file_fingerprint, load_prediction_table
+from shadow_scoring import ShadowScorer
+
+MODEL_PATH = "best_model.pkl"
+# Seconds before a model that failed to load in the background is tried again
+SWAP_RETRY_S = 5.0
+# Seconds between checks of whether the loaded model is still the one to serve
+FRESHNESS_CHECK_S = 1.0
+
+
+class SalaryPredictor:
+    """Fitted pipeline, compiled kernel and prediction table for one model file version."""
+
+    def __init__(self, model_path=MODEL_PATH, fingerprint=None, batching=True):
+        self.model_path = model_path
+        self.fingerprint = fingerprint or file_fingerprint(model_path)
+        # Prefers the sklearn-free .npz artifact; pipeline is None when it was used
+        self.kernel, self.pipeline = load_model(model_path)
+        self.table = load_prediction_table(model_path, predictor=self.kernel)
+        # Accepted categories and aliases, derived from the fitted encoder
+        self.schema = InputSchema(self.kernel.vocabularies)
+        # Calibrated at training time; None when the model has no (fresh) intervals file
+        self.intervals = load_intervals(model_path)
+        # Owned by this model version, so a reload starts with an empty cache
+        self.cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE)
+        self.version = self.fingerprint['sha256'][:12]
+        self.logger = get_prediction_logger(PREDICTION_LOG_DIR)
+        # Candidate model scored on a copy of this model's traffic, attached by get_predictor
+        self.shadow = None
+        # Concurrent sessions' model calls share one vectorized predict. Not worth it for the
+        # linear kernel, whose single-row call is cheaper than handing the row to another thread.
+        self.batcher = None
+        if batching and MICRO_BATCH_SIZE > 1 and not isinstance(self.kernel, LinearKernel):
+            self.batcher = BatchingExecutor(self.kernel.predict, MICRO_BATCH_SIZE, MICRO_BATCH_WAIT_MS)
+
+    def predict_one(self, row, source=None):
+        """Predict one row in FEATURE_COLUMNS order: cache, then table lookup, else the compiled model.
+
+        Categories are canonicalized first, so "Software Engineer" scores as "Engineer".
+        Every call is recorded in the prediction log, tagged with `source`.
+        """
+        start = time.perf_counter()
+        canonical, _ = self.schema.canonicalize_one(row)
+        prediction = self.cache.get_or_compute(canonical, self._predict_uncached)
+        elapsed = time.perf_counter() - start
+        if self.logger is not None:
+            self.logger.log(source, row, prediction, elapsed, self.version)
+        if self.shadow is not None:
+            self.shadow.submit(row, prediction, elapsed)
+        return prediction
+
+    def _predict_uncached(self, row):
+        value = self.table.lookup(row)
+        if value is None:
+            value = self.kernel.predict_one(row) if self.batcher is None else self.batcher.predict_one(row)
+        return value
+
+    def predict(self, X, source=None):
+        """Score a batch; it is logged and shadowed only when a `source` is given (what-if sweeps are not)."""
+        start = time.perf_counter()
+        canonical, _ = self.schema.canonicalize(X)
+        predictions = self.kernel.predict(canonical)
+        elapsed = time.perf_counter() - start
+        if source is not None:
+            if self.logger is not None:
+                self.logger.log_batch(source, X, predictions, elapsed, self.version)
+            if self.shadow is not None:
+                self.shadow.submit_batch(X, predictions, elapsed)
+        return predictions
+
+    def explain_one(self, row):
+        """Per-feature contributions ``{column: amount}``, or None if the model is not linear."""
+        if not hasattr(self.kernel, 'explain_one'):
+            return None
+        return self.kernel.explain_one(self.schema.canonicalize_one(row)[0])
+
+    def explain(self, X):
+        """Contributions as an ``(n_rows, n_features)`` array, or None if the model is not linear."""
+        if not hasattr(self.kernel, 'explain'):
+            return None
+        canonical, _ = self.schema.canonicalize(X)
+        return self.kernel.explain(canonical)
+
+    def interval_one(self, row, prediction):
+        """Calibrated (low, high) around `prediction`, or None if the model has no intervals."""
+        if self.intervals is None:
+            return None
+        return self.intervals.interval_one(self.schema.canonicalize_one(row)[0], prediction)
+
+
+_lock = threading.Lock()
+_predictors = {}  # model path -> SalaryPredictor
+_swapping = set()  # model paths whose replacement is loading in the background
+_retry_after = {}  # model path -> monotonic time before which a failed swap is not retried
+_next_check = {}  # model path -> monotonic time before which the loaded model is assumed fresh
+
+registry = ModelRegistry(MODEL_REGISTRY_DIR) if MODEL_REGISTRY_DIR else None
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def serving_path(model_path=MODEL_PATH):
+    """The file served for `model_path`: the registry's promoted version for the default model, else itself."""
+    if registry is not None and model_path == MODEL_PATH:
+        version = registry.current()
+        if version is not None:
+            return registry.model_path(version)
+    return model_path
+
+
+def _registry_paths(model_path):
+    """(served file, shadow candidate file or None) for `model_path`, reading each registry pointer once."""
+    if registry is None or model_path != MODEL_PATH:
+        return model_path, None
+    current, shadow = registry.current(), registry.shadow()
+    served = registry.model_path(current) if current is not None else model_path
+    if shadow is None or shadow == current:
+        return served, None
+    return served, registry.model_path(shadow)
+
+
+def _is_fresh(predictor, model_path):
+    """Whether `predictor` still serves what `model_path` points at; rechecked every FRESHNESS_CHECK_S."""
+    now = time.monotonic()
+    if now < _next_check.get(model_path, 0.0):
+        return True
+    _next_check[model_path] = now + FRESHNESS_CHECK_S
+    served, shadow_path = _registry_paths(model_path)
+    shadow = predictor.shadow.candidate.model_path if predictor.shadow is not None else None
+    if predictor.model_path != served or shadow != shadow_path:
+        return False
+    try:
+        return _stat_key(predictor.model_path) == (predictor.fingerprint['size'], predictor.fingerprint['mtime_ns'])
+    except OSError:
+        # Removed or being replaced: keep serving the loaded model until a new one appears
+        return True
+
+
+def _load(model_path, current=None):
+    """A predictor for what `model_path` serves now, reusing whatever `current` has loaded."""
+    path, shadow_path = _registry_paths(model_path)
+    fingerprint = file_fingerprint(path)
+    if current is not None and current.model_path == path and current.fingerprint['sha256'] == fingerprint['sha256']:
+        # Touched but unchanged (or only the shadow changed): keep the loaded model
+        predictor = current
+        predictor.fingerprint = fingerprint
+    else:
+        predictor = SalaryPredictor(path, fingerprint=fingerprint)
+
+    old_shadow = current.shadow if current is not None else None
+    if old_shadow is not None and predictor is current and old_shadow.candidate.model_path == shadow_path:
+        return predictor
+    if shadow_path is not None:
+        candidate = SalaryPredictor(shadow_path, batching=False)
+        candidate.logger = None  # only production answers are audited
+        predictor.shadow = ShadowScorer(candidate, predictor.version,
+                                        report_dir=os.path.join(registry.root, "shadow"))
+    else:
+        predictor.shadow = None
+    if old_shadow is not None:
+        old_shadow.close()
+    if current is not None and predictor is not current and current.batcher is not None:
+        # Sessions still holding the old predictor are scored inline from now on
+        current.batcher.close()
+    return predictor
+
+
+def _swap(model_path, current):
+    try:
+        _predictors[model_path] = _load(model_path, current)
+    except Exception:
+        # Keep serving the loaded model; a broken or half-copied file is retried later
+        _retry_after[model_path] = time.monotonic() + SWAP_RETRY_S
+    finally:
+        _swapping.discard(model_path)
+
+
+def get_predictor(model_path=MODEL_PATH):
+    """Return the shared predictor for `model_path`, swapping in a changed model in the background."""
+    predictor = _predictors.get(model_path)
+    if predictor is not None and (model_path in _swapping or _is_fresh(predictor, model_path)):
+        return predictor
+
+    with _lock:
+        predictor = _predictors.get(model_path)
+        if predictor is None:
+            # Nothing to serve yet, so the first request of the process waits for the load
+            predictor = _predictors[model_path] = _load(model_path)
+        elif model_path not in _swapping and time.monotonic() >= _retry_after.get(model_path, 0.0):
+            _swapping.add(model_path)
+            threading.Thread(target=_swap, args=(model_path, predictor), name="model-swap", daemon=True).start()
+        return predictor
@@ -0,0 +1,297 @@
+"""Precomputed salary statistics over the training data, for the market insights.
+
+Salary count, mean, median and percentiles are aggregated over every
+combination of Education x Location x Job_Title x Gender x experience band,
+including the "all" rollup of each dimension, into one dense array. Rendering
+an insight is then an index into that array instead of a groupby over the CSV.
+
+The cube is persisted next to the CSV (``<stem>.cube.npz``) together with the
+compact category codes and salaries it was built from. When rows are appended
+to the CSV only the new bytes are parsed; a rewritten file triggers a rebuild.
+
+    python salary_cube.py --data salary_prediction_data.csv
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from itertools import combinations
+
+import numpy as np
+
+from schema import CATEGORICAL_COLUMNS, TARGET_COLUMN
+
+DATA_PATH = "salary_prediction_data.csv"
+
+# Experience bands as [lower, next lower) in years; the last band is open-ended
+EXPERIENCE_EDGES = (0, 3, 6, 10, 15, 20, 30)
+EXPERIENCE_BANDS = tuple(
+    f"{lo}-{hi - 1}" if hi is not None else f"{lo}+"
+    for lo, hi in zip(EXPERIENCE_EDGES, EXPERIENCE_EDGES[1:] + (None,))
+)
+DIMENSIONS = CATEGORICAL_COLUMNS + ['Experience_Band']
+
+QUANTILES = (0.10, 0.25, 0.50, 0.75, 0.90)
+STATISTICS = ('count', 'mean', 'p10', 'p25', 'median', 'p75', 'p90')
+
+
+def default_cube_path(data_path):
+    return os.path.splitext(data_path)[0] + ".cube.npz"
+
+
+def experience_band(years):
+    """Band index for an array of experience values (negatives go to the first band)."""
+    return np.maximum(np.searchsorted(EXPERIENCE_EDGES, years, side='right') - 1, 0)
+
+
+def _group_statistics(group_ids, salary, n_groups):
+    """STATISTICS for every group id in ``range(n_groups)`` from one sort, no per-group loop."""
+    order = np.lexsort((salary, group_ids))
+    ids, values = group_ids[order], salary[order]
+    counts = np.bincount(ids, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    out = np.full((n_groups, len(STATISTICS)), np.nan)
+    out[:, 0] = counts
+    present = counts > 0
+    n, first = counts[present], starts[present]
+    out[present, 1] = np.bincount(ids, weights=values, minlength=n_groups)[present] / n
+    for j, q in enumerate(QUANTILES, start=2):
+        # Linear interpolation between order statistics, as numpy.quantile does
+        position = q * (n - 1)
+        lo = np.floor(position).astype(np.int64)
+        hi = np.minimum(lo + 1, n - 1)
+        a, b = values[first + lo], values[first + hi]
+        out[present, j] = a + (b - a) * (position - lo)
+    return out
+
+
+class SalaryCube:
+    """Dense cube of salary statistics; the last index of every dimension is the "all" rollup."""
+
+    def __init__(self, vocabularies, codes, salary, source=None):
+        self.vocabularies = {dim: [str(v) for v in vocabularies[dim]] for dim in DIMENSIONS}
+        self.codes = np.asarray(codes, dtype=np.int16).reshape(-1, len(DIMENSIONS))
+        self.salary = np.asarray(salary, dtype=np.float64)
+        self.source = source or {}
+        self._index = {dim: {value: i for i, value in enumerate(vocab)} for dim, vocab in self.vocabularies.items()}
+        self.values = self._aggregate()
+
+    @property
+    def n_rows(self):
+        return len(self.salary)
+
+    @property
+    def shape(self):
+        return tuple(len(self.vocabularies[dim]) + 1 for dim in DIMENSIONS)
+
+    def _aggregate(self):
+        shape = self.shape
+        values = np.full(shape + (len(STATISTICS),), np.nan)
+        values[..., 0] = 0
+        flat = values.reshape(-1, len(STATISTICS))
+        all_codes = np.array(shape) - 1
+        # One pass per grouping set; each set fills a disjoint part of the cube
+        for size in range(len(DIMENSIONS) + 1):
+            for grouped in combinations(range(len(DIMENSIONS)), size):
+                columns = [self.codes[:, d] if d in grouped else np.full(self.n_rows, all_codes[d])
+                           for d in range(len(DIMENSIONS))]
+                ids = np.ravel_multi_index(columns, shape) if self.n_rows else np.zeros(0, dtype=np.int64)
+                stats = _group_statistics(ids, self.salary, flat.shape[0])
+                filled = stats[:, 0] > 0
+                flat[filled] = stats[filled]
+        return values
+
+    def lookup(self, **filters):
+        """Statistics for one cell, e.g. ``lookup(Education='PhD')``; omitted dimensions are rolled up.
+
+        Returns a dict keyed by STATISTICS, or None when no rows fall in the cell
+        (including values never seen in the data).
+        """
+        index = []
+        for dim in DIMENSIONS:
+            value = filters.pop(dim, None)
+            if value is None:
+                index.append(len(self.vocabularies[dim]))
+            else:
+                code = self._index[dim].get(str(value))
+                if code is None:
+                    return None
+                index.append(code)
+        if filters:
+            raise ValueError(f"Unknown dimensions: {', '.join(filters)}")
+        stats = self.values[tuple(index)]
+        if stats[0] == 0:
+            return None
+        return {name: int(value) if name == 'count' else float(value) for name, value in zip(STATISTICS, stats)}
+
+    def breakdown(self, dimension, **filters):
+        """``{value: statistics}`` for each populated value of `dimension`, in vocabulary order."""
+        out = {}
+        for value in self.vocabularies[dimension]:
+            stats = self.lookup(**{dimension: value}, **filters)
+            if stats is not None:
+                out[value] = stats
+        return out
+
+    def save(self, path):
+        # Per-process temp name: several apps may refresh the same cube at once
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        try:
+            np.savez(tmp_path, codes=self.codes, salary=self.salary, values=self.values,
+                     source=np.array(json.dumps(self.source)),
+                     **{f"vocabulary_{dim}": np.array(vocab) for dim, vocab in self.vocabularies.items()})
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            cube = cls.__new__(cls)
+            cube.vocabularies = {dim: data[f"vocabulary_{dim}"].tolist() for dim in DIMENSIONS}
+            cube.codes, cube.salary, cube.values = data['codes'], data['salary'], data['values']
+            cube.source = json.loads(str(data['source']))
+        cube._index = {dim: {value: i for i, value in enumerate(vocab)} for dim, vocab in cube.vocabularies.items()}
+        return cube
+
+
+def _encode_rows(frame, vocabularies):
+    """Category codes for a parsed CSV chunk, appending values not seen before to `vocabularies`."""
+    import pandas as pd
+
+    frame = frame.dropna(subset=CATEGORICAL_COLUMNS + ['Experience', TARGET_COLUMN])
+    codes = np.empty((len(frame), len(DIMENSIONS)), dtype=np.int16)
+    for i, col in enumerate(CATEGORICAL_COLUMNS):
+        values = frame[col].astype(str)
+        vocab = vocabularies[col]
+        vocab.extend(sorted(set(values.unique()) - set(vocab)))
+        codes[:, i] = pd.Index(vocab).get_indexer(values)
+    codes[:, -1] = experience_band(pd.to_numeric(frame['Experience']).to_numpy(dtype=float))
+    return codes, pd.to_numeric(frame[TARGET_COLUMN]).to_numpy(dtype=float)
+
+
+def _read_rows(data_path, offset=0):
+    """Parse the CSV from byte `offset` on; returns (frame, header, end offset)."""
+    import pandas as pd
+
+    with open(data_path, "rb") as f:
+        header = f.readline()
+        if offset:
+            f.seek(offset)
+        body = f.read()
+        end = f.tell()
+    frame = pd.read_csv(io.BytesIO(header + body)) if body.strip() else None
+    return frame, header.decode().strip(), end
+
+
+def _prefix_sha256(path, size):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining > 0:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def _source_info(data_path, header, offset):
+    stat = os.stat(data_path)
+    return {'path': os.path.abspath(data_path), 'header': header, 'offset': offset,
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'prefix_sha256': _prefix_sha256(data_path, offset)}
+
+
+def build_cube(data_path=DATA_PATH, cube_path=None):
+    """Aggregate the whole CSV from scratch and persist the cube."""
+    vocabularies = {col: [] for col in CATEGORICAL_COLUMNS}
+    vocabularies['Experience_Band'] = list(EXPERIENCE_BANDS)
+    frame, header, end = _read_rows(data_path)
+    if frame is not None:
+        codes, salary = _encode_rows(frame, vocabularies)
+    else:
+        codes, salary = np.empty((0, len(DIMENSIONS))), np.empty(0)
+    cube = SalaryCube(vocabularies, codes, salary, source=_source_info(data_path, header, end))
+    cube.save(cube_path or default_cube_path(data_path))
+    return cube
+
+
+def refresh_cube(cube, data_path=DATA_PATH, cube_path=None):
+    """Bring `cube` up to date with `data_path`, parsing only appended rows when possible."""
+    source = cube.source
+    stat = os.stat(data_path)
+    if (stat.st_size, stat.st_mtime_ns) == (source.get('size'), source.get('mtime_ns')):
+        return cube
+    offset = source.get('offset', 0)
+    appended = (stat.st_size >= offset > 0 and _prefix_sha256(data_path, offset) == source.get('prefix_sha256'))
+    if appended:
+        with open(data_path, "rb") as f:
+            f.seek(offset - 1)
+            appended = f.read(1) == b"\n"  # the consumed part ended on a complete row
+    if not appended:
+        return build_cube(data_path, cube_path)
+
+    frame, header, end = _read_rows(data_path, offset)
+    if header != source.get('header'):
+        return build_cube(data_path, cube_path)
+    vocabularies = {dim: list(vocab) for dim, vocab in cube.vocabularies.items()}
+    codes, salary = cube.codes, cube.salary
+    if frame is not None:
+        new_codes, new_salary = _encode_rows(frame, vocabularies)
+        codes = np.concatenate([codes, new_codes])
+        salary = np.concatenate([salary, new_salary])
+    cube = SalaryCube(vocabularies, codes, salary, source=_source_info(data_path, header, end))
+    cube.save(cube_path or default_cube_path(data_path))
+    return cube
+
+
+def load_cube(data_path=DATA_PATH, cube_path=None):
+    """Open the persisted cube for `data_path`, building or refreshing it as needed."""
+    cube_path = cube_path or default_cube_path(data_path)
+    try:
+        cube = SalaryCube.load(cube_path)
+    except (OSError, ValueError, KeyError):
+        return build_cube(data_path, cube_path)
+    if cube.source.get('path') != os.path.abspath(data_path):
+        return build_cube(data_path, cube_path)
+    return refresh_cube(cube, data_path, cube_path)
+
+
+_lock = threading.Lock()
+_cubes = {}  # data path -> SalaryCube
+
+
+def get_cube(data_path=DATA_PATH):
+    """Return the shared cube for `data_path`, refreshing it when the CSV changes."""
+    cube = _cubes.get(data_path)
+    if cube is not None:
+        stat = os.stat(data_path)
+        if (stat.st_size, stat.st_mtime_ns) == (cube.source.get('size'), cube.source.get('mtime_ns')):
+            return cube
+    with _lock:
+        cube = _cubes.get(data_path)
+        cube = refresh_cube(cube, data_path) if cube is not None else load_cube(data_path)
+        _cubes[data_path] = cube
+        return cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the salary statistics cube.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default=None, help="Defaults to <data>.cube.npz")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore the persisted cube and start over.")
+    args = parser.parse_args()
+
+    cube = build_cube(args.data, args.output) if args.rebuild else load_cube(args.data, args.output)
+    print(f"{args.output or default_cube_path(args.data)}: {cube.n_rows:,} rows, "
+          f"cube shape {cube.shape} x {len(STATISTICS)} statistics")
+
+
+if __name__ == '__main__':
+    main()
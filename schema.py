@@ -0,0 +1,6 @@
+# Column layout shared with salary_prediction_data.csv and the trained pipeline.
+# Kept free of heavy imports so the sklearn-free scoring path stays fast to load.
+FEATURE_COLUMNS = ['Education', 'Experience', 'Location', 'Job_Title', 'Age', 'Gender']
+NUMERIC_COLUMNS = ['Experience', 'Age']
+CATEGORICAL_COLUMNS = ['Education', 'Location', 'Job_Title', 'Gender']
+TARGET_COLUMN = 'Salary'
@@ -0,0 +1,168 @@
+"""Shadow scoring: run a candidate model on a copy of live traffic.
+
+The request path only appends ``(rows, production predictions, production
+latency)`` to a bounded deque, as the prediction log does. A background thread
+scores the same rows with the candidate, and records the prediction deltas
+(candidate minus production) and the latency of both models. Users are always
+answered by production; a slow or failing candidate only costs dropped samples.
+
+Summaries are shown in the sidebar and written every ``report_interval``
+seconds to ``model_registry/shadow/`` (``python model_registry.py list``).
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from latency_metrics import LatencyHistogram
+
+WINDOW_SIZE = 10_000
+
+
+class ShadowScorer:
+    def __init__(self, candidate, production_version, capacity=10_000, poll_interval=0.05,
+                 report_dir=None, report_interval=10.0):
+        self.candidate = candidate
+        self.production_version = production_version
+        self.version = candidate.version
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.report_dir = report_dir
+        self.report_interval = report_interval
+        self.dropped = 0
+        self.errors = 0
+        self.rows = 0
+        self._delta_sum = 0.0
+        self._abs_delta_sum = 0.0
+        self._abs_production_sum = 0.0
+        self._max_abs_delta = 0.0
+        self._recent_abs_deltas = deque(maxlen=WINDOW_SIZE)
+        # Single-row calls and batches are timed separately; their latencies do not compare
+        self.latency = {(model, kind): LatencyHistogram()
+                        for model in ('production', 'candidate') for kind in ('row', 'batch')}
+        self._queue = deque(maxlen=capacity)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    # --- request path ---
+
+    def submit(self, row, prediction, latency_s):
+        self._enqueue((False, row, prediction, latency_s))
+
+    def submit_batch(self, rows, predictions, latency_s):
+        self._enqueue((True, rows, predictions, latency_s))
+
+    def _enqueue(self, item):
+        if len(self._queue) >= self.capacity:
+            # The full deque evicts its oldest item; count the rows that item carried
+            try:
+                batch, _, production, _ = self._queue[0]
+                self.dropped += len(production) if batch else 1
+            except IndexError:
+                pass  # drained by the scorer in the meantime
+        self._queue.append(item)
+
+    # --- background scoring ---
+
+    def _run(self):
+        last_report = time.monotonic()
+        while not self._stop.wait(self.poll_interval):
+            while self._queue:
+                try:
+                    item = self._queue.popleft()
+                except IndexError:
+                    break
+                try:
+                    self._score(*item)
+                except Exception:
+                    # A candidate that cannot score some input must not stop the comparison
+                    self.errors += 1
+            if self.report_dir and time.monotonic() - last_report >= self.report_interval:
+                last_report = time.monotonic()
+                try:
+                    self.write_report()
+                except OSError:
+                    self.errors += 1
+
+    def _score(self, batch, rows, production, production_s):
+        start = time.perf_counter()
+        if batch:
+            candidate = self.candidate.predict(rows)
+        else:
+            candidate, production, rows = [self.candidate.predict_one(rows)], [production], None
+        candidate_s = time.perf_counter() - start
+        kind = 'batch' if batch else 'row'
+        self.latency['production', kind].observe(production_s)
+        self.latency['candidate', kind].observe(candidate_s)
+        for new, old in zip(candidate, production):
+            delta = float(new) - float(old)
+            self.rows += 1
+            self._delta_sum += delta
+            self._abs_delta_sum += abs(delta)
+            self._abs_production_sum += abs(float(old))
+            self._max_abs_delta = max(self._max_abs_delta, abs(delta))
+            self._recent_abs_deltas.append(abs(delta))
+
+    def summary(self):
+        recent = sorted(self._recent_abs_deltas)
+        delta = {}
+        if self.rows:
+            delta = {
+                'mean': self._delta_sum / self.rows,
+                'mean_abs': self._abs_delta_sum / self.rows,
+                'mean_abs_pct': self._abs_delta_sum / self._abs_production_sum * 100 if self._abs_production_sum else None,
+                'p50_abs': recent[len(recent) // 2],
+                'p95_abs': recent[min(len(recent) - 1, int(0.95 * len(recent)))],
+                'max_abs': self._max_abs_delta,
+            }
+        return {
+            'production': self.production_version, 'candidate': self.version, 'pid': os.getpid(),
+            'updated_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'rows': self.rows, 'dropped': self.dropped, 'errors': self.errors, 'delta': delta,
+            'latency_ms': {model: self.latency[model, 'row'].summary() for model in ('production', 'candidate')},
+            'batch_latency_ms': {model: self.latency[model, 'batch'].summary() for model in ('production', 'candidate')},
+        }
+
+    def write_report(self):
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self.version}-vs-{self.production_version}-{os.getpid()}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """Stop scoring; queued samples are discarded and a final report is written."""
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+        if self.report_dir and self.rows:
+            try:
+                self.write_report()
+            except OSError:
+                pass
+
+
+def render_shadow_panel(shadow):
+    """Sidebar panel comparing the shadow candidate with production; nothing when shadow mode is off."""
+    if shadow is None:
+        return
+    import streamlit as st
+
+    summary = shadow.summary()
+    with st.sidebar.expander("🌓 Shadow Model"):
+        st.caption(f"Candidate {summary['candidate']} scored alongside production {summary['production']} "
+                   "(this process, since the candidate was loaded)")
+        delta, latency = summary['delta'], summary['latency_ms']
+        cols = st.columns(2)
+        cols[0].metric("Rows compared", f"{summary['rows']:,}")
+        cols[1].metric("Mean |Δ|", f"${delta['mean_abs']:,.2f}" if delta else "–")
+        if delta:
+            st.caption(f"Δ mean {delta['mean']:+,.2f} · p95 |Δ| {delta['p95_abs']:,.2f} · max |Δ| {delta['max_abs']:,.2f}")
+        if latency['candidate'].get('count'):
+            st.caption(f"p95 latency: production {latency['production']['p95_ms']:.3f} ms · "
+                       f"candidate {latency['candidate']['p95_ms']:.3f} ms")
+        if summary['dropped'] or summary['errors']:
+            st.caption(f"Dropped {summary['dropped']:,} · Errors {summary['errors']:,}")
@@ -0,0 +1,270 @@
+"""Reproducible training for the salary model (script version of the notebook).
+
+Reads salary_prediction_data.csv, fits the notebook's five candidate models in
+parallel, cross-validates them and writes the best pipeline to best_model.pkl
+together with a JSON metrics report.
+
+    python train.py --data salary_prediction_data.csv --output best_model.pkl --n-jobs -1
+
+The data file is encoded once into a memory-mapped sparse matrix under
+.feature_cache/ (feature_cache.py) and reused by later runs until the file or
+the feature definition changes. Each worker maps the cache itself and only the
+StandardScaler is fitted per split (each CV fold and the holdout split).
+
+For files that do not fit in memory, ``--streaming`` reads the CSV in chunks
+and accumulates the normal equations of the linear model instead:
+
+    python train.py --streaming --chunksize 200000 --data payroll_export.csv
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.svm import SVR
+
+from feature_cache import CACHE_DIR, load_features
+from prediction_intervals import SEGMENT_COLUMN, analytic_spec, calibrate, save_intervals
+from schema import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS, TARGET_COLUMN
+
+DATA_PATH = "salary_prediction_data.csv"
+REPORT_PATH = "training_report.json"
+RANDOM_STATE = 42
+
+
+def load_training_data(path=DATA_PATH):
+    data = pd.read_csv(path)
+    data.dropna(inplace=True)
+    return data[FEATURE_COLUMNS], data[TARGET_COLUMN]
+
+
+def build_preprocessor():
+    return ColumnTransformer(
+        transformers=[
+            ('num', StandardScaler(), NUMERIC_COLUMNS),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_COLUMNS)
+        ])
+
+
+def candidate_models(random_state=RANDOM_STATE):
+    return {
+        'LinearRegression': LinearRegression(),
+        'RandomForestRegressor': RandomForestRegressor(random_state=random_state),
+        'GradientBoostingRegressor': GradientBoostingRegressor(random_state=random_state),
+        'KNeighborsRegressor': KNeighborsRegressor(),
+        'SVR': SVR()
+    }
+
+
+def numeric_transformer(preprocessor):
+    return dict((name, transformer) for name, transformer, _ in preprocessor.transformers)['num']
+
+
+def fit_and_score(name, model, split, features, train_rows, test_rows, scaler):
+    # `features` arrives in worker processes as a path and is memory-mapped there, not copied
+    X_train, y_train, X_test, y_test = features.split(train_rows, test_rows, scaler)
+    # A fresh copy per task: without worker processes the same object would be refit on every split
+    model = clone(model)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_s = time.perf_counter() - start
+    mse = mean_squared_error(y_test, y_pred)
+    return {
+        'model': name, 'split': split, 'estimator': model if split == 'holdout' else None,
+        'MSE': mse, 'RMSE': float(np.sqrt(mse)), 'R2': r2_score(y_test, y_pred),
+        'fit_s': fit_s, 'predict_s': predict_s, 'n_test': len(y_test),
+    }
+
+
+def train(data_path=DATA_PATH, cv=5, n_jobs=-1, test_size=0.2, random_state=RANDOM_STATE, models=None,
+          cache_dir=CACHE_DIR):
+    """Fit and evaluate every candidate; return (best_pipeline, report)."""
+    wall_start = time.perf_counter()
+    models = models or candidate_models(random_state)
+
+    # Encoded once per data file and feature definition, then memory-mapped from the cache
+    encode_start = time.perf_counter()
+    preprocessor = build_preprocessor()
+    features = load_features(data_path, preprocessor, load_training_data, cache_dir)
+    encode_s = time.perf_counter() - encode_start
+
+    train_rows, test_rows = train_test_split(np.arange(features.n_rows), test_size=test_size, random_state=random_state)
+    splits = [('holdout', train_rows, test_rows)]
+    if cv > 1:
+        folds = KFold(n_splits=cv, shuffle=True, random_state=random_state).split(train_rows)
+        for i, (fold_train, fold_test) in enumerate(folds):
+            splits.append((f'fold{i}', train_rows[fold_train], train_rows[fold_test]))
+
+    # One task per (candidate, split), spread across cores
+    scaler = numeric_transformer(preprocessor)
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(fit_and_score)(name, model, split, features, split_train, split_test, scaler)
+        for name, model in models.items()
+        for split, split_train, split_test in splits
+    )
+
+    report = {'data': data_path, 'n_rows': features.n_rows, 'n_train': len(train_rows), 'n_test': len(test_rows),
+              'cv_folds': cv if cv > 1 else 0, 'encode_s': encode_s, 'feature_cache': features.path, 'models': {}}
+    estimators = {}
+    for name in models:
+        runs = [r for r in results if r['model'] == name]
+        holdout = next(r for r in runs if r['split'] == 'holdout')
+        cv_r2 = [r['R2'] for r in runs if r['split'] != 'holdout']
+        estimators[name] = holdout['estimator']
+        report['models'][name] = {
+            'MSE': holdout['MSE'], 'RMSE': holdout['RMSE'], 'R2': holdout['R2'],
+            'cv_R2_mean': float(np.mean(cv_r2)) if cv_r2 else None,
+            'cv_R2_std': float(np.std(cv_r2)) if cv_r2 else None,
+            'fit_s': holdout['fit_s'],
+            'predict_us_per_row': holdout['predict_s'] / holdout['n_test'] * 1e6,
+            'wall_clock_s': sum(r['fit_s'] + r['predict_s'] for r in runs),
+        }
+
+    best_model_name = max(report['models'], key=lambda name: report['models'][name]['R2'])
+    report['best_model'] = best_model_name
+    # Split-conformal intervals from the best model's residuals on the untouched holdout rows
+    _, _, X_test, y_test = features.split(train_rows, test_rows, scaler)
+    residuals = y_test - estimators[best_model_name].predict(X_test)
+    report['intervals'] = calibrate(residuals, features.category_values(SEGMENT_COLUMN, test_rows))
+    report['total_wall_clock_s'] = time.perf_counter() - wall_start
+    best_pipeline = Pipeline(steps=[('preprocessor', features.fitted_preprocessor(preprocessor, train_rows)),
+                                    ('regressor', estimators[best_model_name])])
+    return best_pipeline, report
+
+
+def train_streaming(data_path=DATA_PATH, chunksize=200_000):
+    """Fit the linear pipeline out of core; memory is bounded by `chunksize`, not the file size.
+
+    Categorical columns are parsed straight into compact category codes and
+    each chunk is folded into running normal-equation sums (see
+    incremental_update.SufficientStats), so no chunk is kept after it is read.
+    """
+    from incremental_update import SufficientStats
+
+    wall_start = time.perf_counter()
+    stats = SufficientStats({col: [] for col in CATEGORICAL_COLUMNS})
+    dtypes = {col: 'category' for col in CATEGORICAL_COLUMNS}
+    dtypes.update({col: 'float64' for col in NUMERIC_COLUMNS + [TARGET_COLUMN]})
+    reader = pd.read_csv(data_path, usecols=FEATURE_COLUMNS + [TARGET_COLUMN], dtype=dtypes, chunksize=chunksize)
+    for chunk in reader:
+        stats.update(chunk, grow_vocabulary=True)
+
+    pipeline = stats.solve()
+    elapsed = time.perf_counter() - wall_start
+    report = {
+        'data': data_path, 'mode': 'streaming', 'chunksize': chunksize, 'n_rows': stats.n,
+        'best_model': 'LinearRegression',
+        'models': {'LinearRegression': {'train_R2': stats.r2(), 'wall_clock_s': elapsed,
+                                        'rows_per_s': stats.n / elapsed if elapsed > 0 else None}},
+        'total_wall_clock_s': elapsed,
+        'intervals': analytic_spec(stats.residual_std(), stats.n),
+    }
+    return pipeline, report
+
+
+def print_report(report):
+    if report.get('mode') == 'streaming':
+        metrics = report['models']['LinearRegression']
+        print(f"\n--- Streaming LinearRegression over {report['n_rows']:,} rows ---")
+        print(f"  Training R2: {metrics['train_R2']:.4f}")
+        print(f"  Wall-clock: {metrics['wall_clock_s']:.2f}s ({metrics['rows_per_s']:,.0f} rows/s)")
+        return
+
+    print("\n--- Model Performance Summary (Regression) ---")
+    for name, metrics in report['models'].items():
+        cv_text = f"  CV R2: {metrics['cv_R2_mean']:.4f} ± {metrics['cv_R2_std']:.4f}" if metrics['cv_R2_mean'] is not None else ""
+        print(f"{name}:")
+        print(f"  MSE: {metrics['MSE']:.4f}")
+        print(f"  RMSE: {metrics['RMSE']:.4f}")
+        print(f"  R2: {metrics['R2']:.4f}{cv_text}")
+        print(f"  Wall-clock: {metrics['wall_clock_s']:.3f}s  Predict: {metrics['predict_us_per_row']:.2f} us/row")
+        if 'params' in metrics:
+            print(f"  Params: {metrics['params'] or 'defaults'}  ({metrics['configs_sampled']} sampled)")
+            print(f"  Serving: {metrics['serving_ms']:.3f} ms/prediction  R2 per ms: {metrics['r2_per_ms']:.1f}")
+    if report.get('mode') == 'tuning':
+        print(f"\nSearch: {report['search_s']:.1f}s of {report['budget_s']:.0f}s budget, "
+              f"{report['fits_run']} fits run, {report['fits_resumed']} resumed from the checkpoint")
+        print(f"Selected on {report['selection']}")
+    print(f"\nThe best model is: {report['best_model']}")
+    print(f"Total wall-clock: {report['total_wall_clock_s']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the salary prediction model.")
+    parser.add_argument('--data', default=DATA_PATH)
+    parser.add_argument('--output', default="best_model.pkl")
+    parser.add_argument('--report', default=None, help=f"Defaults to {REPORT_PATH} next to --output.")
+    parser.add_argument('--cv', type=int, default=5, help="Cross-validation folds (0 to skip).")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--random-state', type=int, default=RANDOM_STATE)
+    parser.add_argument('--streaming', action='store_true',
+                        help="Fit LinearRegression out of core, reading --data in chunks.")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="Rows per chunk with --streaming.")
+    parser.add_argument('--register', action='store_true',
+                        help="Also add the model to the model registry as a new (unpromoted) version.")
+    parser.add_argument('--feature-cache', default=CACHE_DIR, help="Directory of the encoded-matrix cache.")
+    parser.add_argument('--tune', action='store_true',
+                        help="Search hyperparameters with successive halving and pick on R2 per serving ms.")
+    parser.add_argument('--budget', type=float, default=600.0, help="Seconds of hyperparameter search with --tune.")
+    parser.add_argument('--candidates', type=int, default=24, help="Configurations sampled per model with --tune.")
+    parser.add_argument('--checkpoint', default="tuning_checkpoint.json",
+                        help="Resumable record of finished --tune fits ('' disables it).")
+    parser.add_argument('--max-r2-drop', type=float, default=0.01,
+                        help="With --tune, models this far below the best R2 are not exported.")
+    args = parser.parse_args()
+
+    if args.streaming:
+        best_pipeline, report = train_streaming(args.data, chunksize=args.chunksize)
+    elif args.tune:
+        from tuning import tune
+
+        best_pipeline, report = tune(args.data, budget_s=args.budget, n_candidates=args.candidates, cv=args.cv,
+                                     n_jobs=args.n_jobs, test_size=args.test_size, random_state=args.random_state,
+                                     max_r2_drop=args.max_r2_drop, checkpoint=args.checkpoint,
+                                     cache_dir=args.feature_cache)
+    else:
+        best_pipeline, report = train(args.data, cv=args.cv, n_jobs=args.n_jobs,
+                                      test_size=args.test_size, random_state=args.random_state,
+                                      cache_dir=args.feature_cache)
+    print_report(report)
+
+    # Write to a temporary file first so running apps never load a partial pickle
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    tmp_output = args.output + ".tmp"
+    joblib.dump(best_pipeline, tmp_output)
+    save_intervals(report['intervals'], args.output, source_path=tmp_output)
+    os.replace(tmp_output, args.output)
+    report_path = args.report or os.path.join(os.path.dirname(args.output), REPORT_PATH)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"The best model's complete pipeline has been saved to '{args.output}'; metrics in '{report_path}'.")
+    if args.register:
+        from app_settings import MODEL_REGISTRY_DIR
+        from model_registry import ModelRegistry
+
+        best = report['models'][report['best_model']]
+        metrics = {'model': report['best_model'], 'n_rows': report['n_rows'],
+                   **{key: value for key, value in best.items() if key in ('R2', 'RMSE', 'train_R2', 'serving_ms')}}
+        version = ModelRegistry(MODEL_REGISTRY_DIR or "model_registry").register(args.output, metrics=metrics)
+        print(f"Registered as {version}; try it with 'python model_registry.py shadow {version}'.")
+
+
+if __name__ == '__main__':
+    main()
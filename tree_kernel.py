@@ -0,0 +1,219 @@
+"""Flattened-array inference for the tree ensembles the training notebook can select.
+
+When RandomForestRegressor or GradientBoostingRegressor wins, every tree of
+the fitted pipeline is copied into one set of contiguous arrays:
+
+    feature[p], threshold[p]   split p, ``x[feature[p]] > threshold[p]``, once per
+                               distinct split in the whole ensemble
+    split[n]                   the split tested at node n
+    child[n]                   its left child; the right child is child[n] + 1
+    value[n]                   the prediction of node n when it is a leaf
+
+Nodes are renumbered breadth-first so that a split's two children are
+adjacent, and leaves point at themselves with a split that is never true. A
+batch first evaluates every distinct split for every row into a boolean
+matrix (a few hundred comparisons per row), then all trees of all rows move
+down one level per step with ``node = child[node] + goes_right[row, split[node]]``.
+
+The ColumnTransformer is reproduced with NumPy (scaled numerics followed by
+one-hot columns) and cast to float32 like sklearn's trees do, so predictions
+match ``pipeline.predict`` to float rounding.
+"""
+import numpy as np
+
+from linear_kernel import feature_columns
+from schema import FEATURE_COLUMNS
+
+# Rows are traversed in chunks of about this many (row, tree) pairs to stay in cache
+CHUNK_CELLS = 1 << 17
+
+
+class FeatureEncoder:
+    """NumPy version of a fitted ``StandardScaler`` + ``OneHotEncoder(handle_unknown='ignore')`` ColumnTransformer."""
+
+    def __init__(self, n_outputs, numeric, categorical, feature_names=FEATURE_COLUMNS):
+        self.n_outputs = n_outputs
+        self.feature_names = list(feature_names)
+        # (column, output index, mean, scale)
+        self.numeric = [(col, int(index), float(mean), float(scale)) for col, index, mean, scale in numeric]
+        # column -> (sorted vocabulary, output index of each vocabulary entry)
+        self.categorical = {col: (np.asarray(vocabulary, dtype=str), np.asarray(outputs, dtype=np.intp))
+                            for col, (vocabulary, outputs) in categorical.items()}
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        numeric, categorical = [], {}
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop' or len(columns) == 0:
+                continue
+            outputs = np.arange(preprocessor.output_indices_[name].start, preprocessor.output_indices_[name].stop)
+            if transformer == 'passthrough':
+                numeric += [(col, index, 0.0, 1.0) for col, index in zip(columns, outputs)]
+            elif isinstance(transformer, StandardScaler):
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+                scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+                numeric += list(zip(columns, outputs, mean, scale))
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop_idx_ is not None or getattr(transformer, '_infrequent_enabled', False):
+                    raise ValueError("OneHotEncoder with drop or infrequent categories is not supported.")
+                offset = 0
+                for col, categories in zip(columns, transformer.categories_):
+                    categories = np.asarray(categories).astype(str)
+                    order = np.argsort(categories)
+                    categorical[col] = (categories[order], outputs[offset + order])
+                    offset += len(categories)
+            else:
+                raise ValueError(f"Unsupported transformer '{name}': {transformer!r}")
+        feature_names = list(getattr(preprocessor, 'feature_names_in_', FEATURE_COLUMNS))
+        n_outputs = sum(s.stop - s.start for s in preprocessor.output_indices_.values())
+        return cls(n_outputs, numeric, categorical, feature_names)
+
+    @property
+    def vocabularies(self):
+        return {col: vocabulary for col, (vocabulary, _) in self.categorical.items()}
+
+    def transform(self, X):
+        """The float32 ``(n_rows, n_outputs)`` matrix sklearn's trees would see for X."""
+        columns = feature_columns(X, self.feature_names)
+        n_rows = len(columns[self.feature_names[0]])
+        out = np.zeros((n_rows, self.n_outputs))
+        for col, index, mean, scale in self.numeric:
+            out[:, index] = (np.asarray(columns[col], dtype=float) - mean) / scale
+        for col, (vocabulary, outputs) in self.categorical.items():
+            values = np.asarray(columns[col]).astype(str)
+            position = np.minimum(np.searchsorted(vocabulary, values), len(vocabulary) - 1)
+            known = vocabulary[position] == values
+            # Unknown categories leave every one-hot column at 0, as handle_unknown='ignore' does
+            out[np.flatnonzero(known), outputs[position[known]]] = 1.0
+        return out.astype(np.float32)
+
+
+def flatten_trees(trees):
+    """Concatenate fitted sklearn ``Tree`` objects into ``(feature, threshold, split, child, value, roots, depth)``."""
+    splits, children, values, roots = [], [], [], []
+    predicates = {}  # (feature, threshold) -> split index
+    offset = 0
+    for tree in trees:
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output trees are supported.")
+        left, right = tree.children_left, tree.children_right
+        # Breadth-first renumbering, so each split's children get adjacent indices
+        order = [0]
+        for node in order:
+            if left[node] != -1:
+                order += [left[node], right[node]]
+        new_index = np.empty(tree.node_count, dtype=np.intp)
+        new_index[order] = np.arange(len(order))
+        for node in order:
+            if left[node] == -1:
+                splits.append(-1)
+                children.append(offset + new_index[node])
+            else:
+                key = (int(tree.feature[node]), float(tree.threshold[node]))
+                splits.append(predicates.setdefault(key, len(predicates)))
+                children.append(offset + new_index[left[node]])
+        values.append(tree.value[order, 0, 0])
+        roots.append(offset)
+        offset += len(order)
+
+    # One extra split that is never true (x > inf) keeps leaves in place
+    feature = np.array([f for f, _ in predicates] + [0], dtype=np.intp)
+    threshold = np.array([t for _, t in predicates] + [np.inf], dtype=np.float64)
+    split = np.array(splits, dtype=np.intp)
+    split[split < 0] = len(predicates)
+    return (feature, threshold, split, np.array(children, dtype=np.intp), np.concatenate(values).astype(np.float64),
+            np.array(roots, dtype=np.intp), max(tree.max_depth for tree in trees))
+
+
+class TreeEnsembleKernel:
+    """Pandas- and sklearn-free scorer for a fitted preprocessor + tree-ensemble pipeline.
+
+    A prediction is ``offset + scale * sum(leaf value of each tree)``: the mean
+    over trees for a random forest, ``init + learning_rate * sum`` for gradient
+    boosting.
+    """
+
+    def __init__(self, encoder, trees, scale=1.0, offset=0.0, chunk_cells=CHUNK_CELLS):
+        self.encoder = encoder
+        self.feature_names = encoder.feature_names
+        self.feature, self.threshold, self.split, self.child, self.value, self.roots, self.depth = flatten_trees(trees)
+        self.scale = float(scale)
+        self.offset = float(offset)
+        self.chunk_cells = chunk_cells
+
+    @property
+    def vocabularies(self):
+        return self.encoder.vocabularies
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.child)
+
+    def predict_one(self, row):
+        """Score one row given as a tuple in ``feature_names`` order."""
+        return float(self.predict([row])[0])
+
+    def predict(self, X):
+        """Score a DataFrame, a 2-D array or a sequence of row tuples."""
+        matrix = self.encoder.transform(X)
+        out = np.empty(len(matrix))
+        step = max(1, self.chunk_cells // self.n_trees)
+        for start in range(0, len(matrix), step):
+            out[start:start + step] = self._predict_encoded(matrix[start:start + step])
+        return out
+
+    def _predict_encoded(self, matrix):
+        n_rows = len(matrix)
+        # goes_right[row, p]: float32 inputs against float64 thresholds, as sklearn compares them
+        goes_right = (matrix[:, self.feature] > self.threshold).ravel()
+        row_starts = (np.arange(n_rows, dtype=np.intp) * len(self.feature))[:, None]
+        nodes = np.repeat(self.roots[None, :], n_rows, axis=0)
+        # Every tree of every row moves one level per step; leaves stay where they are
+        for _ in range(self.depth):
+            nodes = self.child[nodes] + goes_right[row_starts + self.split[nodes]]
+        return self.offset + self.scale * self.value[nodes].sum(axis=1)
+
+
+def compile_tree_pipeline(pipeline):
+    """Compile a fitted ``preprocessor -> tree ensemble`` pipeline into a TreeEnsembleKernel.
+
+    Supports DecisionTreeRegressor, RandomForestRegressor, ExtraTreesRegressor
+    and GradientBoostingRegressor. Raises ValueError for anything else.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.dummy import DummyRegressor
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.tree import DecisionTreeRegressor
+
+    preprocessor = pipeline.named_steps.get('preprocessor')
+    regressor = pipeline.steps[-1][1]
+    if not isinstance(preprocessor, ColumnTransformer) or len(pipeline.steps) != 2:
+        raise ValueError("Expected a 'preprocessor' ColumnTransformer followed by a regressor.")
+
+    if isinstance(regressor, DecisionTreeRegressor):
+        trees, scale, offset = [regressor.tree_], 1.0, 0.0
+    elif isinstance(regressor, (RandomForestRegressor, ExtraTreesRegressor)):
+        trees = [estimator.tree_ for estimator in regressor.estimators_]
+        scale, offset = 1.0 / len(trees), 0.0
+    elif isinstance(regressor, GradientBoostingRegressor):
+        trees = [estimator.tree_ for estimator in regressor.estimators_[:, 0]]
+        scale = regressor.learning_rate
+        if isinstance(regressor.init_, str) and regressor.init_ == 'zero':
+            offset = 0.0
+        elif isinstance(regressor.init_, DummyRegressor):
+            offset = float(np.ravel(regressor.init_.constant_)[0])
+        else:
+            raise ValueError("GradientBoostingRegressor with a custom init estimator is not supported.")
+    else:
+        raise ValueError(f"{type(regressor).__name__} is not a supported tree ensemble.")
+
+    encoder = FeatureEncoder.from_preprocessor(preprocessor)
+    if encoder.n_outputs != regressor.n_features_in_:
+        raise ValueError(f"Preprocessor produces {encoder.n_outputs} features, the model expects {regressor.n_features_in_}.")
+    return TreeEnsembleKernel(encoder, trees, scale=scale, offset=offset)
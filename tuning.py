@@ -0,0 +1,276 @@
+"""Hyperparameter search for the candidate models, within a wall-clock budget.
+
+Each candidate model gets a random sample of configurations from its search
+space (the notebook's defaults are always included) and is tuned with
+successive halving: every configuration is cross-validated with a small
+number of training rows, the best 1/eta are kept, and the survivors get eta
+times as many rows, until the last rung trains on the full fold. All
+(model, configuration, fold) fits of a rung run in parallel across cores.
+
+Finished fits are written to a JSON checkpoint after every rung, so an
+interrupted or out-of-budget search resumes where it stopped:
+
+    python train.py --tune --budget 600 --checkpoint tuning_checkpoint.json
+
+When the budget runs out, fits that have not started are skipped and each
+model keeps the best configuration from the largest rung it completed. The
+best configuration of every model is then refitted on the training rows,
+scored on the holdout rows and compiled like the apps serve it
+(linear_kernel.compile_predictor) to time a single-row prediction. The
+exported model is the one with the most R² per millisecond of serving latency
+among those within ``max_r2_drop`` of the best holdout R².
+"""
+import json
+import math
+import os
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.model_selection import KFold, ParameterSampler, train_test_split
+from sklearn.pipeline import Pipeline
+
+from feature_cache import CACHE_DIR, load_features
+from prediction_intervals import SEGMENT_COLUMN, calibrate
+from train import DATA_PATH, RANDOM_STATE, build_preprocessor, candidate_models, fit_and_score, \
+    load_training_data, numeric_transformer
+
+CHECKPOINT_PATH = "tuning_checkpoint.json"
+# Smallest number of training rows a configuration is fitted on
+MIN_RESOURCES = 60
+# Single-row predictions timed per model to estimate serving latency
+LATENCY_ROWS = 200
+
+
+def search_spaces():
+    """Per-model parameter distributions, sampled by ParameterSampler."""
+    return {
+        'LinearRegression': {},
+        'RandomForestRegressor': {
+            'n_estimators': randint(10, 300), 'max_depth': [None, 4, 6, 8, 12, 16],
+            'min_samples_leaf': randint(1, 10), 'max_features': [1.0, 0.5, 'sqrt'],
+        },
+        'GradientBoostingRegressor': {
+            'n_estimators': randint(20, 400), 'learning_rate': loguniform(0.01, 0.3),
+            'max_depth': randint(2, 6), 'subsample': uniform(0.6, 0.4),
+        },
+        'KNeighborsRegressor': {'n_neighbors': randint(2, 30), 'weights': ['uniform', 'distance'], 'p': [1, 2]},
+        'SVR': {'C': loguniform(1e2, 1e6), 'epsilon': loguniform(10, 5000), 'kernel': ['rbf', 'linear']},
+    }
+
+
+def sample_configs(space, n_candidates, random_state):
+    """The default configuration followed by up to `n_candidates - 1` distinct samples, as plain Python values."""
+    configs, seen = [{}], {'{}'}
+    if not space:
+        return configs
+    for params in ParameterSampler(space, n_candidates - 1, random_state=random_state):
+        params = {key: value.item() if isinstance(value, np.generic) else value for key, value in params.items()}
+        key = config_key(params)
+        if key not in seen:
+            seen.add(key)
+            configs.append(params)
+    return configs
+
+
+def config_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def rung_resources(max_resources, n_configs, eta, min_resources=MIN_RESOURCES):
+    """Training rows per rung, growing by `eta` and ending at `max_resources`."""
+    n_rungs = 1 + min(math.ceil(math.log(n_configs, eta)) if n_configs > 1 else 0,
+                      int(math.log(max(max_resources / min_resources, 1), eta)))
+    return [max_resources // eta ** (n_rungs - 1 - i) for i in range(n_rungs)]
+
+
+# --- checkpoint ---
+
+def load_checkpoint(path, fingerprint):
+    """Fit results of an earlier run with the same settings, keyed by task; empty otherwise."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        state = json.load(f)
+    if state.get('fingerprint') != fingerprint:
+        print(f"Ignoring '{path}': it was written for a different data file or search settings.")
+        return {}
+    return state['results']
+
+
+def save_checkpoint(path, fingerprint, results):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({'fingerprint': fingerprint, 'results': results}, f)
+    os.replace(tmp_path, path)
+
+
+def task_key(name, params, resources, split):
+    return f"{name}|{config_key(params)}|{resources}|{split}"
+
+
+# --- search ---
+
+def _fit_before(deadline, name, model, split, features, train_rows, test_rows, scaler):
+    # time.time(), unlike perf_counter, is comparable across worker processes
+    if time.time() > deadline:
+        return None
+    try:
+        result = fit_and_score(name, model, split, features, train_rows, test_rows, scaler)
+    except Exception as exc:
+        # A configuration that cannot be fitted (e.g. more neighbours than rows) is just a bad configuration
+        return {'error': f"{type(exc).__name__}: {exc}"}
+    return {key: result[key] for key in ('R2', 'fit_s', 'predict_s', 'n_test')}
+
+
+def _mean_r2(results, name, params, resources, folds):
+    runs = [results.get(task_key(name, params, resources, split)) for split, _, _ in folds]
+    if any(run is None for run in runs):
+        return None  # not finished
+    if any('error' in run for run in runs):
+        return -math.inf
+    return float(np.mean([run['R2'] for run in runs]))
+
+
+def successive_halving(features, train_rows, scaler, models, configs, folds, eta, deadline, n_jobs,
+                       results, checkpoint=None, fingerprint=None):
+    """Run every model's halving ladder; return ``{name: (params, rows, cv_R2 per fold)}`` of the best configs."""
+    ladders = {name: rung_resources(min(len(rows) for _, rows, _ in folds), len(configs[name]), eta)
+               for name in models}
+    survivors = {name: list(configs[name]) for name in models}
+    best = {}
+    for rung in range(max(len(ladder) for ladder in ladders.values())):
+        tasks = []
+        for name, ladder in ladders.items():
+            if rung >= len(ladder) or time.time() > deadline:
+                continue
+            for params in survivors[name]:
+                model = clone(models[name]).set_params(**params)
+                for split, fold_train, fold_test in folds:
+                    key = task_key(name, params, ladder[rung], split)
+                    if key not in results:
+                        tasks.append((key, delayed(_fit_before)(deadline, name, model, split, features,
+                                                                fold_train[:ladder[rung]], fold_test, scaler)))
+        if tasks:
+            print(f"Rung {rung}: {len(tasks)} fits")
+            outputs = Parallel(n_jobs=n_jobs)(task for _, task in tasks)
+            results.update((key, output) for (key, _), output in zip(tasks, outputs) if output is not None)
+            save_checkpoint(checkpoint, fingerprint, results)
+
+        for name, ladder in ladders.items():
+            if rung >= len(ladder):
+                continue
+            scores = [(_mean_r2(results, name, params, ladder[rung], folds), i)
+                      for i, params in enumerate(survivors[name])]
+            finished = [(score, i) for score, i in scores if score is not None]
+            if len(finished) < len(scores):
+                # Out of budget: keep the best of the last complete rung
+                ladders[name] = ladder[:rung]
+                continue
+            finished.sort(key=lambda item: (-item[0], item[1]))
+            params = survivors[name][finished[0][1]]
+            best[name] = (params, ladder[rung], [results[task_key(name, params, ladder[rung], split)]['R2']
+                                                 for split, _, _ in folds])
+            survivors[name] = [survivors[name][i] for _, i in finished[:max(1, math.ceil(len(finished) / eta))]]
+    return best
+
+
+
+# --- final selection ---
+
+def serving_latency_ms(pipeline, rows):
+    """Median milliseconds of one ``predict_one`` of the pipeline compiled as the apps serve it."""
+    from linear_kernel import compile_predictor
+
+    predictor = compile_predictor(pipeline)
+    predictor.predict_one(rows[0])
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        predictor.predict_one(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1e3)
+
+
+def select_model(report_models, max_r2_drop):
+    """The model with the highest R² per serving millisecond among those close enough to the best R²."""
+    best_r2 = max(metrics['R2'] for metrics in report_models.values())
+    eligible = [name for name, metrics in report_models.items() if metrics['R2'] >= best_r2 - max_r2_drop]
+    return max(eligible, key=lambda name: report_models[name]['r2_per_ms'])
+
+
+def tune(data_path=DATA_PATH, budget_s=600.0, n_candidates=24, eta=3, cv=5, n_jobs=-1, test_size=0.2,
+         random_state=RANDOM_STATE, max_r2_drop=0.01, checkpoint=CHECKPOINT_PATH, cache_dir=CACHE_DIR):
+    """Tune every candidate within `budget_s` seconds of search; return (best_pipeline, report) like train()."""
+    wall_start = time.perf_counter()
+    deadline = time.time() + budget_s
+    models = candidate_models(random_state)
+    preprocessor = build_preprocessor()
+    features = load_features(data_path, preprocessor, load_training_data, cache_dir)
+    scaler = numeric_transformer(preprocessor)
+
+    # Same holdout as train(); the search only ever sees the training rows
+    train_rows, test_rows = train_test_split(np.arange(features.n_rows), test_size=test_size, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    # Fold training rows in a fixed random order, so a rung's subsample is a prefix of the next rung's
+    folds = [(f'fold{i}', rng.permutation(train_rows[fold_train]), train_rows[fold_test])
+             for i, (fold_train, fold_test) in
+             enumerate(KFold(n_splits=max(cv, 2), shuffle=True, random_state=random_state).split(train_rows))]
+    spaces = search_spaces()
+    configs = {name: sample_configs(spaces[name], n_candidates, random_state) for name in models}
+
+    fingerprint = {'feature_cache': os.path.basename(features.path), 'random_state': random_state,
+                   'test_size': test_size, 'cv': max(cv, 2), 'eta': eta,
+                   'configs': {name: [config_key(params) for params in configs[name]] for name in models}}
+    results = load_checkpoint(checkpoint, fingerprint)
+    resumed = len(results)
+    best = successive_halving(features, train_rows, scaler, models, configs, folds, eta, deadline, n_jobs,
+                              results, checkpoint, fingerprint)
+    search_s = time.perf_counter() - wall_start
+
+    # Best configuration per model (the defaults if the budget ran out before its first rung)
+    finalists = {name: best.get(name, ({}, None, [])) for name in models}
+    holdout = Parallel(n_jobs=n_jobs)(
+        delayed(fit_and_score)(name, clone(models[name]).set_params(**params), 'holdout', features,
+                               train_rows, test_rows, scaler)
+        for name, (params, _, _) in finalists.items()
+    )
+    x, _ = load_training_data(data_path)
+    latency_rows = list(x.iloc[test_rows[:LATENCY_ROWS]].itertuples(index=False, name=None))
+    fitted_preprocessor = features.fitted_preprocessor(preprocessor, train_rows)
+
+    report = {'data': data_path, 'mode': 'tuning', 'n_rows': features.n_rows, 'n_train': len(train_rows),
+              'n_test': len(test_rows), 'cv_folds': max(cv, 2), 'budget_s': budget_s, 'search_s': search_s,
+              'eta': eta, 'fits_resumed': resumed, 'fits_run': len(results) - resumed,
+              'selection': f"R2 per serving ms, within {max_r2_drop} of the best R2", 'feature_cache': features.path,
+              'models': {}}
+    pipelines = {}
+    for result in holdout:
+        name = result['model']
+        params, resources, cv_r2 = finalists[name]
+        pipelines[name] = Pipeline(steps=[('preprocessor', fitted_preprocessor), ('regressor', result['estimator'])])
+        serving_ms = serving_latency_ms(pipelines[name], latency_rows)
+        runs = [run for key, run in results.items() if key.startswith(f"{name}|")]
+        report['models'][name] = {
+            'params': params, 'configs_sampled': len(configs[name]), 'search_rows': resources,
+            'MSE': result['MSE'], 'RMSE': result['RMSE'], 'R2': result['R2'],
+            'cv_R2_mean': float(np.mean(cv_r2)) if cv_r2 else None,
+            'cv_R2_std': float(np.std(cv_r2)) if cv_r2 else None,
+            'fit_s': result['fit_s'],
+            'predict_us_per_row': result['predict_s'] / result['n_test'] * 1e6,
+            'serving_ms': serving_ms, 'r2_per_ms': result['R2'] / serving_ms,
+            'wall_clock_s': sum(run.get('fit_s', 0.0) + run.get('predict_s', 0.0) for run in runs),
+        }
+
+    best_model_name = select_model(report['models'], max_r2_drop)
+    report['best_model'] = best_model_name
+    _, _, X_test, y_test = features.split(train_rows, test_rows, scaler)
+    residuals = y_test - pipelines[best_model_name].steps[-1][1].predict(X_test)
+    report['intervals'] = calibrate(residuals, features.category_values(SEGMENT_COLUMN, test_rows))
+    report['total_wall_clock_s'] = time.perf_counter() - wall_start
+    return pipelines[best_model_name], report
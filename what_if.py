@@ -0,0 +1,49 @@
+"""What-if sensitivity curves around the current input.
+
+For the last submitted row, one axis (Experience or Age) is swept across its
+full input range for every Education level. The whole sweep is a single batch
+scored by one vectorized ``predict`` call (4 x 61 rows for Experience), so the
+panel redraws as fast as a single prediction instead of one rerun per point.
+"""
+import numpy as np
+
+from latency_metrics import time_stage
+from prediction_table import GRID_AXES
+from schema import FEATURE_COLUMNS
+
+EDUCATION_LEVELS = GRID_AXES['Education']
+SWEEP_AXES = ('Experience', 'Age')
+
+
+def sweep_batch(row, axis):
+    """Rows in FEATURE_COLUMNS order: `row` with `axis` swept, one block per Education level."""
+    values = np.array(GRID_AXES[axis])
+    batch = np.empty((len(EDUCATION_LEVELS) * len(values), len(FEATURE_COLUMNS)), dtype=object)
+    batch[:] = np.array(row, dtype=object)
+    batch[:, FEATURE_COLUMNS.index('Education')] = np.repeat(EDUCATION_LEVELS, len(values))
+    batch[:, FEATURE_COLUMNS.index(axis)] = np.tile(values, len(EDUCATION_LEVELS))
+    return values, batch
+
+
+def sweep(predictor, row, axis):
+    """Return ``(axis values, {education: predictions})`` from one predict call."""
+    values, batch = sweep_batch(row, axis)
+    predictions = np.asarray(predictor.predict(batch), dtype=np.float64).reshape(len(EDUCATION_LEVELS), len(values))
+    return values, dict(zip(EDUCATION_LEVELS, predictions))
+
+
+def render_what_if(predictor, row, app):
+    """Sensitivity curves for `row` (the last submitted input); nothing is drawn before a submit."""
+    if row is None:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    st.subheader("📈 What If?")
+    axis = st.radio("Vary", SWEEP_AXES, horizontal=True, key="what_if_axis",
+                    help="Predicted salary across the full range, one curve per education level.")
+    with time_stage(app, "what_if"):
+        values, curves = sweep(predictor, row, axis)
+    st.line_chart(pd.DataFrame(curves, index=pd.Index(values, name=axis)))
+    current = dict(zip(FEATURE_COLUMNS, row))
+    st.caption(f"Other inputs held at your submission: {', '.join(f'{col} {current[col]}' for col in FEATURE_COLUMNS if col not in ('Education', axis))}.")